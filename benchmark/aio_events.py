@@ -0,0 +1,38 @@
+"""
+Event loop overhead of AsyncCurl, thousands of concurrent small responses against the
+local benchmark server. Start the server first:
+
+    uvicorn benchmark.server:app --port 8000 --log-level warning
+    python benchmark/aio_events.py [N] [CONCURRENCY] [epoll] [uvloop]
+
+`epoll` watches the sockets with AsyncCurl's own epoll set, `uvloop` runs on uvloop.
+"""
+import asyncio
+import sys
+import time
+
+from curl_cffi.requests import AsyncSession
+
+URL = "http://localhost:8000/1k"
+
+
+async def run(n, concurrency, epoll):
+    async with AsyncSession(max_clients=concurrency, epoll=epoll) as s:
+        # warm up the connections
+        await asyncio.gather(*[s.get(URL) for _ in range(concurrency)])
+        start = time.perf_counter()
+        async for r in s.map((URL for _ in range(n)), concurrency=concurrency):
+            r.raise_for_status()
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    epoll = "epoll" in sys.argv
+    if "uvloop" in sys.argv:
+        import uvloop
+
+        uvloop.install()
+    dur = asyncio.run(run(n, concurrency, epoll))
+    print(f"{n} requests, {concurrency} concurrent: {dur:.2f}s, {n / dur:.0f} req/s")
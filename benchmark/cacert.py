@@ -0,0 +1,49 @@
+"""
+Time to the first request across N fresh curl handles, with the CA bundle read from
+its path by every handle (before), and shared by the process (after).
+
+Needs an https url, e.g. a local server with a certificate from the default bundle:
+
+    python benchmark/cacert.py https://localhost:8443/1k [N]
+"""
+import asyncio
+import sys
+import time
+
+import curl_cffi.curl
+from curl_cffi import Curl, CurlOpt
+from curl_cffi.requests import AsyncSession
+
+
+class PathCurl(Curl):
+    """Curl setting the CA path on every handle, as before the process-wide cache."""
+
+    def _set_default_cacert(self):
+        ret = self.setopt(CurlOpt.CAINFO, self._cacert)
+        self._check_error(ret, "set cacert")
+
+
+async def first_requests(url, n, curl_class):
+    s = AsyncSession(max_clients=n)
+    s._create_curl = lambda: curl_class()
+    start = time.perf_counter()
+    await asyncio.gather(*[s.get(url) for _ in range(n)])
+    dur = time.perf_counter() - start
+    s.close()
+    return dur
+
+
+def bench(name, url, n, curl_class):
+    dur = asyncio.run(first_requests(url, n, curl_class))
+    print(f"{name:>8}: {dur * 1000:.1f} ms to the first request on {n} handles")
+    return dur
+
+
+if __name__ == "__main__":
+    url = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    before = bench("before", url, n, PathCurl)
+    # start from a cold cache, as a new process would.
+    curl_cffi.curl._cacert_blobs.clear()
+    after = bench("after", url, n, Curl)
+    print(f"speedup: {before / after:.2f}x")
@@ -0,0 +1,36 @@
+"""
+Loading 5000 cookies into a fresh curl handle, with a COOKIELIST command per cookie
+(before) and from a cookie file reloaded at once, with `bulk_cookies=True` (after).
+
+No network is involved, run with:
+
+    python benchmark/cookie_file.py
+"""
+import time
+
+from curl_cffi.requests import Session
+
+N = 200
+URL = "https://example.com/path"
+
+
+def bench(name, bulk_cookies):
+    s = Session(bulk_cookies=bulk_cookies)
+    for i in range(5000):
+        s.cookies.set(f"name{i}", f"value{i}", domain=f"site{i % 500}.example.com")
+    curl = s.curl
+    start = time.perf_counter()
+    for _ in range(N):
+        curl._cookie_state = None  # a fresh handle
+        s._set_curl_options(curl, "GET", URL)
+        curl.reset(incremental=True)
+    dur = time.perf_counter() - start
+    print(f"{name:>8}: {dur / N * 1e3:.2f} ms per load")
+    s.close()
+    return dur
+
+
+if __name__ == "__main__":
+    before = bench("before", bulk_cookies=False)
+    after = bench("after", bulk_cookies=True)
+    print(f"speedup: {before / after:.2f}x")
@@ -0,0 +1,38 @@
+"""
+Per-request cookie setup with 2000 cookies across 200 domains, loading all of them
+into curl for every request (before) and pushing only the changes (after).
+
+No network is involved, run with:
+
+    python benchmark/cookies.py
+"""
+import time
+
+from curl_cffi.requests import Session
+
+N = 2000
+URL = "https://example.com/path"
+
+
+def bench(name, full_reload):
+    s = Session()
+    for i in range(2000):
+        s.cookies.set(f"name{i}", f"value{i}", domain=f"site{i % 200}.example.com")
+    curl = s.curl
+    start = time.perf_counter()
+    for i in range(N):
+        if full_reload:
+            curl._cookie_state = None
+        s.cookies.set("changed", str(i), domain="example.com")
+        s._set_curl_options(curl, "GET", URL)
+        curl.reset(incremental=True)
+    dur = time.perf_counter() - start
+    print(f"{name:>8}: {dur / N * 1e6:.2f} us per request")
+    s.close()
+    return dur
+
+
+if __name__ == "__main__":
+    before = bench("before", full_reload=True)
+    after = bench("after", full_reload=False)
+    print(f"speedup: {before / after:.2f}x")
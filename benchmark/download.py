@@ -0,0 +1,44 @@
+"""
+Time to save a large response to disk, written chunk by chunk from python with
+`content_callback` (before) and from C with `Session.download` (after).
+
+Needs a url of a large file, e.g. served with `python -m http.server`:
+
+    python benchmark/download.py http://localhost:8000/big.bin [N]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from curl_cffi.requests import Session
+
+
+def with_callback(s, url, path):
+    with open(path, "wb") as f:
+        s.get(url, content_callback=f.write, accept_encoding=None)
+
+
+def with_download(s, url, path):
+    s.download(url, path)
+
+
+def bench(name, fn, url, n):
+    with Session() as s, tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "body")
+        fn(s, url, path)  # warm up
+        start = time.perf_counter()
+        for _ in range(n):
+            fn(s, url, path)
+        dur = time.perf_counter() - start
+        size = os.path.getsize(path)
+    print(f"{name:>8}: {size * n / dur / 1e6:.0f} MB/s")
+    return dur
+
+
+if __name__ == "__main__":
+    url = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    before = bench("before", with_callback, url, n)
+    after = bench("after", with_download, url, n)
+    print(f"speedup: {before / after:.2f}x")
@@ -0,0 +1,66 @@
+"""
+Splitting a streamed body into lines, with the previous `pending + chunk` algorithm
+and the incremental line splitter used by `Response.iter_lines` now.
+
+No network is involved, run with:
+
+    python benchmark/iter_lines.py
+"""
+import time
+
+from curl_cffi.requests.models import _LineSplitter
+
+CHUNK_SIZE = 16 * 1024
+
+
+def legacy_iter_lines(chunks, delimiter=None):
+    pending = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pending + chunk
+        if delimiter:
+            lines = chunk.split(delimiter)
+        else:
+            lines = chunk.splitlines()
+        if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
+            pending = lines.pop()
+        else:
+            pending = None
+        yield from lines
+    if pending is not None:
+        yield pending
+
+
+def iter_lines(chunks, delimiter=None):
+    splitter = _LineSplitter(delimiter)
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    line = splitter.flush()
+    if line is not None:
+        yield line
+
+
+def chunked(data):
+    return [data[i : i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+
+INPUTS = {
+    "one 8MB line": chunked(b"x" * 8 * 1024 * 1024 + b"\n"),
+    "1M short lines": chunked(b'{"id": 1, "ok": true}\n' * 1024 * 1024),
+}
+
+
+def bench(name, func, chunks):
+    start = time.perf_counter()
+    count = sum(1 for _ in func(chunks))
+    dur = time.perf_counter() - start
+    print(f"{name:>8}: {dur * 1000:9.1f} ms, {count} lines")
+    return dur
+
+
+if __name__ == "__main__":
+    for input_name, chunks in INPUTS.items():
+        print(input_name)
+        before = bench("before", legacy_iter_lines, chunks)
+        after = bench("after", iter_lines, chunks)
+        print(f" speedup: {before / after:.2f}x")
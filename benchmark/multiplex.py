@@ -0,0 +1,37 @@
+"""
+Connections opened by AsyncSession when firing many requests at one HTTP/2 host at
+once, with different connection policies. Counted with `CurlInfo.NUM_CONNECTS`.
+
+    python benchmark/multiplex.py https://localhost:8443/1k [N]
+"""
+import asyncio
+import sys
+import time
+
+from curl_cffi import CurlInfo
+from curl_cffi.requests import AsyncSession
+
+POLICIES = {
+    "default": {},
+    "pipewait": {"pipewait": True},
+    "max_host_connections=1": {"max_host_connections": 1},
+    "no multiplex": {"multiplex": False},
+}
+
+
+async def run(url, n, kwargs):
+    async with AsyncSession(
+        max_clients=n, verify=False, curl_infos=[CurlInfo.NUM_CONNECTS], **kwargs
+    ) as s:
+        start = time.perf_counter()
+        rs = await asyncio.gather(*[s.get(url) for _ in range(n)])
+        dur = time.perf_counter() - start
+    return sum(r.infos[CurlInfo.NUM_CONNECTS] for r in rs), dur
+
+
+if __name__ == "__main__":
+    url = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    for name, kwargs in POLICIES.items():
+        connects, dur = asyncio.run(run(url, n, kwargs))
+        print(f"{name:>24}: {connects:>4} connections, {dur * 1000:.1f} ms for {n} requests")
@@ -0,0 +1,78 @@
+"""
+Per-response overhead of `_parse_response` when only the status code is read, with
+the eager parsing (before) and the lazy `Response` (after).
+
+Needs a url, e.g. the benchmark server:
+
+    python benchmark/response.py http://127.0.0.1:8000/1k
+"""
+import re
+import sys
+import time
+from typing import cast
+
+from curl_cffi import CurlInfo
+from curl_cffi.requests import Headers, Response, Session
+from curl_cffi.requests.cookies import CurlMorsel
+
+N = 20000
+
+
+class LegacySession(Session):
+    """Session parsing every response eagerly, as before the lazy `Response`."""
+
+    def _parse_response(self, curl, buffer, header_buffer):
+        c = curl
+        rsp = Response(c)
+        rsp.url = cast(bytes, c.getinfo(CurlInfo.EFFECTIVE_URL)).decode()
+        if buffer:
+            rsp.content = buffer.getvalue()
+        rsp.http_version = cast(int, c.getinfo(CurlInfo.HTTP_VERSION))
+        rsp.status_code = cast(int, c.getinfo(CurlInfo.RESPONSE_CODE))
+        rsp.ok = 200 <= rsp.status_code < 400
+        header_list = []
+        for header_line in header_buffer.getvalue().splitlines():
+            if not header_line.strip():
+                continue
+            if header_line.startswith(b"HTTP/"):
+                rsp.reason = c.get_reason_phrase(header_line).decode()
+                header_list = []
+                continue
+            if header_line.startswith(b" ") or header_line.startswith(b"\t"):
+                header_list[-1] += header_line
+                continue
+            header_list.append(header_line)
+        rsp.headers = Headers(header_list)
+        morsels = [
+            CurlMorsel.from_curl_format(l) for l in c.getinfo(CurlInfo.COOKIELIST)
+        ]
+        self.cookies.update_cookies_from_curl(morsels)
+        rsp.cookies = self.cookies
+        content_type = rsp.headers.get("Content-Type", default="")
+        m = re.search(r"charset=([\w-]+)", content_type)
+        rsp.encoding = m.group(1) if m else "utf-8"
+        rsp.elapsed = cast(float, c.getinfo(CurlInfo.TOTAL_TIME))
+        rsp.redirect_count = cast(int, c.getinfo(CurlInfo.REDIRECT_COUNT))
+        rsp.redirect_url = cast(bytes, c.getinfo(CurlInfo.REDIRECT_URL)).decode()
+        return rsp
+
+
+def bench(name, session, url):
+    c = session.curl
+    _, buffer, header_buffer, *_ = session._set_curl_options(c, "GET", url)
+    c.perform(clear_headers=False)
+    start = time.perf_counter()
+    for _ in range(N):
+        rsp = session._parse_response(c, buffer, header_buffer)
+        assert rsp.status_code == 200
+    dur = time.perf_counter() - start
+    print(f"{name:>8}: {dur / N * 1e6:.2f} us per response")
+    session.close()
+    return dur
+
+
+if __name__ == "__main__":
+    url = sys.argv[1]
+    before = bench("before", LegacySession(), url)
+    after = bench("after", Session(), url)
+    print(f"speedup: {before / after:.2f}x")
@@ -0,0 +1,64 @@
+"""
+Per-request setup time of `Session._set_curl_options`, with the legacy `setopt`
+(option type dict built and a `ffi.new("int*")` per call) and the current one
+(precomputed option types, typed fast paths and batched `setopts`).
+
+No network is involved, run with:
+
+    python benchmark/setopt.py
+"""
+import time
+
+from curl_cffi import Curl, CurlOpt, ffi, lib
+from curl_cffi.requests import Session
+
+N = 20000
+URL = "https://example.com/path?foo=bar"
+
+
+class LegacyCurl(Curl):
+    """Curl with the setopt implementation before the dispatch table."""
+
+    def setopt(self, option, value):
+        input_option = {
+            0: "int*",
+            10000: "char*",
+            20000: "void*",
+            30000: "int*",
+        }
+        value_type = input_option.get(int(option / 10000) * 10000)
+        if value_type == "int*":
+            if option >= 30000:
+                c_value = ffi.new("long long*", value)
+            else:
+                c_value = ffi.new("int*", value)
+            ret = lib._curl_easy_setopt(self._curl, option, c_value)
+            self._check_error(ret, "setopt", option, value)
+            return ret
+        return super().setopt(option, value)
+
+    def setopts(self, options):
+        for option, value in options.items():
+            self.setopt(option, value)
+
+
+def bench(name, curl):
+    s = Session(
+        curl=curl,
+        headers={"Accept-Language": "en-US", "X-Foo": "bar"},
+        timeout=(3, 10),
+        proxies={"https": "http://localhost:3128"},
+    )
+    start = time.perf_counter()
+    for _ in range(N):
+        s._set_curl_options(curl, "GET", URL, params={"page": 1})
+        curl.reset()
+    dur = time.perf_counter() - start
+    print(f"{name:>8}: {dur / N * 1e6:.2f} us per request")
+    return dur
+
+
+if __name__ == "__main__":
+    before = bench("before", LegacyCurl())
+    after = bench("after", Curl())
+    print(f"speedup: {before / after:.2f}x")
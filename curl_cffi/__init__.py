@@ -1,5 +1,8 @@
 __all__ = [
     "Curl",
+    "CurlShare",
+    "CurlMulti",
+    "CurlMime",
     "CurlInfo",
     "CurlOpt",
     "CurlMOpt",
@@ -15,7 +18,7 @@ __all__ = [
 from ._wrapper import ffi, lib
 
 from .const import CurlInfo, CurlMOpt, CurlOpt, CurlECode, CurlHttpVersion
-from .curl import Curl, CurlError
+from .curl import Curl, CurlError, CurlMime, CurlMulti, CurlShare
 from .aio import AsyncCurl
 
 from .__version__ import __title__, __version__, __description__, __curl_version__
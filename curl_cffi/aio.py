@@ -1,12 +1,14 @@
 import asyncio
+import errno
+import select
 import sys
 import warnings
-from typing import Any
-from weakref import WeakSet, WeakKeyDictionary
+from typing import Any, Callable, Dict, Optional, Tuple
+from weakref import WeakKeyDictionary
 
 from ._wrapper import ffi, lib  # type: ignore
 from .const import CurlMOpt
-from .curl import Curl, DEFAULT_CACERT
+from .curl import CURLOPTTYPE_OBJECTPOINT, Curl, CurlError, DEFAULT_CACERT
 
 __all__ = ["AsyncCurl"]
 
@@ -65,6 +67,100 @@ else:
     _get_selector = _get_selector_noop
 
 
+class EpollSelector:
+    """The add_reader family of methods on a private epoll set, Linux only.
+
+    Only the epoll fd itself is registered with the asyncio loop, so one readiness
+    callback serves all the curl sockets. Other attributes are taken from the loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._epoll = select.epoll()
+        self._readers: Dict[int, Tuple[Callable, tuple]] = {}
+        self._writers: Dict[int, Tuple[Callable, tuple]] = {}
+        self._registered: Dict[int, int] = {}  # fd to the epoll mask registered
+        loop.add_reader(self._epoll.fileno(), self._process_events)
+
+    def __getattr__(self, name):
+        return getattr(self._loop, name)
+
+    def _update(self, fd: int):
+        mask = 0
+        if fd in self._readers:
+            mask |= select.EPOLLIN
+        if fd in self._writers:
+            mask |= select.EPOLLOUT
+        registered = self._registered.get(fd)
+        try:
+            if not mask:
+                self._registered.pop(fd, None)
+                if registered is not None:
+                    try:
+                        self._epoll.unregister(fd)
+                    except OSError as e:
+                        # closed, the kernel already dropped it from the set.
+                        if e.errno not in (errno.EBADF, errno.ENOENT):
+                            raise
+            elif registered is None:
+                self._epoll.register(fd, mask)
+                self._registered[fd] = mask
+            elif registered != mask:
+                try:
+                    self._epoll.modify(fd, mask)
+                except FileNotFoundError:
+                    # the old socket was closed and the fd reused, which the set
+                    # doesn't know yet.
+                    self._epoll.register(fd, mask)
+                self._registered[fd] = mask
+        except OSError as e:
+            if e.errno != errno.EBADF:
+                raise
+            # the fd is already closed, curl removes it once it finds out.
+            self._registered.pop(fd, None)
+
+    def add_reader(self, fd: int, callback: Callable, *args):
+        self._readers[fd] = (callback, args)
+        self._update(fd)
+
+    def add_writer(self, fd: int, callback: Callable, *args):
+        self._writers[fd] = (callback, args)
+        self._update(fd)
+
+    def remove_reader(self, fd: int) -> bool:
+        if self._readers.pop(fd, None) is None:
+            return False
+        self._update(fd)
+        return True
+
+    def remove_writer(self, fd: int) -> bool:
+        if self._writers.pop(fd, None) is None:
+            return False
+        self._update(fd)
+        return True
+
+    def _process_events(self):
+        for fd, events in self._epoll.poll(0):
+            # errors are reported to both sides, curl finds out what happened.
+            if events & (select.EPOLLIN | select.EPOLLERR | select.EPOLLHUP):
+                reader = self._readers.get(fd)
+                if reader is not None:
+                    reader[0](*reader[1])
+            if events & (select.EPOLLOUT | select.EPOLLERR | select.EPOLLHUP):
+                writer = self._writers.get(fd)
+                if writer is not None:
+                    writer[0](*writer[1])
+
+    def close(self):
+        """Unregister from the loop and close the epoll set, the loop is left open."""
+        if not self._epoll.closed:
+            self._loop.remove_reader(self._epoll.fileno())
+            self._epoll.close()
+        self._readers = {}
+        self._writers = {}
+        self._registered = {}
+
+
 CURL_POLL_NONE = 0
 CURL_POLL_IN = 1
 CURL_POLL_OUT = 2
@@ -88,18 +184,17 @@ def timer_function(curlm, timeout_ms: int, clientp: Any):
     """
     async_curl = ffi.from_handle(clientp)
     # print("time out in %sms" % timeout_ms)
-    if timeout_ms == -1:
-        for timer in async_curl._timers:
-            timer.cancel()
-        async_curl._timers = WeakSet()
-    else:
-        timer = async_curl.loop.call_later(
+    # libcurl only keeps one timeout per multi handle, replace the previous one.
+    if async_curl._timer is not None:
+        async_curl._timer.cancel()
+        async_curl._timer = None
+    if timeout_ms != -1:
+        async_curl._timer = async_curl.loop.call_later(
             timeout_ms / 1000,
             async_curl.process_data,
             CURL_SOCKET_TIMEOUT,  # -1
             CURL_POLL_NONE,  # 0
         )
-        async_curl._timers.add(timer)
 
 
 @ffi.def_extern()
@@ -107,37 +202,59 @@ def socket_function(curl, sockfd: int, what: int, clientp: Any, data: Any):
     async_curl = ffi.from_handle(clientp)
     loop = async_curl.loop
 
-    if what & CURL_POLL_IN or what & CURL_POLL_OUT or what & CURL_POLL_REMOVE:
-        if sockfd in async_curl._sockfds:
+    # only touch the loop for the directions that changed
+    registered = async_curl._sockfds.get(sockfd, CURL_POLL_NONE)
+    wanted = CURL_POLL_NONE if what & CURL_POLL_REMOVE else what & CURL_POLL_INOUT
+    changed = registered ^ wanted
+    if not changed:
+        return
+
+    if changed & CURL_POLL_IN:
+        if wanted & CURL_POLL_IN:
+            loop.add_reader(sockfd, async_curl.process_data, sockfd, CURL_CSELECT_IN)
+        else:
             loop.remove_reader(sockfd)
+    if changed & CURL_POLL_OUT:
+        if wanted & CURL_POLL_OUT:
+            loop.add_writer(sockfd, async_curl.process_data, sockfd, CURL_CSELECT_OUT)
+        else:
             loop.remove_writer(sockfd)
-            async_curl._sockfds.remove(sockfd)
-        elif what & CURL_POLL_REMOVE:
-            message = f"File descriptor {sockfd} not found."
-            raise TypeError(message)
-
-    if what & CURL_POLL_IN:
-        loop.add_reader(sockfd, async_curl.process_data, sockfd, CURL_CSELECT_IN)
-        async_curl._sockfds.add(sockfd)
-    if what & CURL_POLL_OUT:
-        loop.add_writer(sockfd, async_curl.process_data, sockfd, CURL_CSELECT_OUT)
-        async_curl._sockfds.add(sockfd)
+
+    if wanted:
+        async_curl._sockfds[sockfd] = wanted
+    else:
+        del async_curl._sockfds[sockfd]
+
 
 class AsyncCurl:
     """Wrapper around curl_multi handle to provide asyncio support. It uses the libcurl
     socket_action APIs."""
 
-    def __init__(self, cacert: str = DEFAULT_CACERT, loop=None):
+    def __init__(self, cacert: str = DEFAULT_CACERT, loop=None, epoll: bool = False):
+        """
+        Parameters:
+            cacert: CA cert path to use, by default, curl_cffi uses its own bundled cert.
+            loop: loop to use, if not provided, the running loop will be used.
+            epoll: watch the curl sockets with a private epoll set, and only its fd
+                with the loop, see `EpollSelector`. Linux only.
+        """
         self._curlm = lib.curl_multi_init()
         self._cacert = cacert
         self._curl2future = {}  # curl to future map
         self._curl2curl = {}  # c curl to Curl
-        self._sockfds = set()  # sockfds
-        self.loop = _get_selector(
-            loop if loop is not None else asyncio.get_running_loop()
-        )
-        self._checker = self.loop.create_task(self._force_timeout())
-        self._timers = WeakSet()
+        self._sockfds: Dict[int, int] = {}  # sockfd to the CURL_POLL_* mask registered
+        # out parameters reused by every call
+        self._running_handles = ffi.new("int *")
+        self._msg_in_queue = ffi.new("int *")
+        loop = loop if loop is not None else asyncio.get_running_loop()
+        self._epoll_selector: Optional[EpollSelector] = None
+        if epoll:
+            if not hasattr(select, "epoll"):
+                raise CurlError("epoll is only available on Linux")
+            self.loop = self._epoll_selector = EpollSelector(loop)  # type: ignore
+        else:
+            self.loop = _get_selector(loop)
+        self._timer: Optional[asyncio.TimerHandle] = None
         self._setup()
 
     def _setup(self):
@@ -149,8 +266,6 @@ class AsyncCurl:
 
     def close(self):
         """Close and cleanup running timers, readers, writers and handles."""
-        # Close force timeout checker
-        self._checker.cancel()
         # Close all pending futures
         for curl, future in self._curl2future.items():
             lib.curl_multi_remove_handle(self._curlm, curl._curl)
@@ -160,20 +275,18 @@ class AsyncCurl:
         lib.curl_multi_cleanup(self._curlm)
         self._curlm = None
         # Remove add readers and writers
-        for sockfd in self._sockfds:
-            self.loop.remove_reader(sockfd)
-            self.loop.remove_writer(sockfd)
-        # Cancel all time functions
-        for timer in self._timers:
-            timer.cancel()
-
-    async def _force_timeout(self):
-        while True:
-            if not self._curlm:
-                break
-            await asyncio.sleep(1)
-            # print("force timeout")
-            self.socket_action(CURL_SOCKET_TIMEOUT, CURL_POLL_NONE)
+        for sockfd, registered in self._sockfds.items():
+            if registered & CURL_POLL_IN:
+                self.loop.remove_reader(sockfd)
+            if registered & CURL_POLL_OUT:
+                self.loop.remove_writer(sockfd)
+        self._sockfds = {}
+        # Cancel the timer
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._epoll_selector is not None:
+            self._epoll_selector.close()
 
     def add_handle(self, curl: Curl):
         """Add a curl handle to be managed by curl_multi. This is the equivalent of
@@ -188,9 +301,10 @@ class AsyncCurl:
 
     def socket_action(self, sockfd: int, ev_bitmask: int) -> int:
         """Call libcurl socket_action function"""
-        running_handle = ffi.new("int *")
-        lib.curl_multi_socket_action(self._curlm, sockfd, ev_bitmask, running_handle)
-        return running_handle[0]
+        lib.curl_multi_socket_action(
+            self._curlm, sockfd, ev_bitmask, self._running_handles
+        )
+        return self._running_handles[0]
 
     def process_data(self, sockfd: int, ev_bitmask: int):
         """Call curl_multi_info_read to read data for given socket."""
@@ -200,24 +314,27 @@ class AsyncCurl:
 
         self.socket_action(sockfd, ev_bitmask)
 
-        msg_in_queue = ffi.new("int *")
+        # drain all the messages first, they are invalid once handles are removed.
+        done = []
         while True:
-            curl_msg = lib.curl_multi_info_read(self._curlm, msg_in_queue)
+            curl_msg = lib.curl_multi_info_read(self._curlm, self._msg_in_queue)
             # print("message in queue", msg_in_queue[0], curl_msg)
             if curl_msg == ffi.NULL:
                 break
             if curl_msg.msg == CURLMSG_DONE:
                 # print("curl_message", curl_msg.msg, curl_msg.data.result)
-                curl = self._curl2curl[curl_msg.easy_handle]
-                retcode = curl_msg.data.result
-                if retcode == 0:
-                    self.set_result(curl)
-                else:
-                    # import pdb; pdb.set_trace()
-                    self.set_exception(curl, curl._get_error(retcode, "perform"))
+                done.append((curl_msg.easy_handle, curl_msg.data.result))
             else:
                 print("NOT DONE")  # Will not reach, for no other code being defined.
 
+        for easy_handle, retcode in done:
+            curl = self._curl2curl[easy_handle]
+            if retcode == 0:
+                self.set_result(curl)
+            else:
+                # import pdb; pdb.set_trace()
+                self.set_exception(curl, curl._get_error(retcode, "perform"))
+
     def _pop_future(self, curl: Curl):
         lib.curl_multi_remove_handle(self._curlm, curl._curl)
         self._curl2curl.pop(curl._curl, None)
@@ -243,4 +360,7 @@ class AsyncCurl:
 
     def setopt(self, option, value):
         """Wrapper around curl_multi_setopt."""
+        if option < CURLOPTTYPE_OBJECTPOINT:
+            # long options, e.g. MAX_HOST_CONNECTIONS, are passed by value.
+            return lib._curl_multi_setopt_long(self._curlm, option, value)
         return lib.curl_multi_setopt(self._curlm, option, value)
@@ -1,11 +1,13 @@
 import os
 import re
+import threading
 import warnings
 from http.cookies import SimpleCookie
-from typing import Any, List, Tuple, Union
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 from ._wrapper import ffi, lib  # type: ignore
-from .const import CurlHttpVersion, CurlInfo, CurlOpt
+from .const import CurlHttpVersion, CurlInfo, CurlMOpt, CurlOpt
 
 try:
     import certifi
@@ -32,6 +34,123 @@ CURLINFO_SSL_DATA_OUT = 6
 
 CURL_WRITEFUNC_PAUSE = 0x10000001
 CURL_WRITEFUNC_ERROR = 0xFFFFFFFF
+CURL_READFUNC_ABORT = 0x10000000
+CURL_READFUNC_PAUSE = 0x10000001
+
+CURLPAUSE_RECV = 1 << 0
+CURLPAUSE_SEND = 1 << 2
+CURLPAUSE_ALL = CURLPAUSE_RECV | CURLPAUSE_SEND
+CURLPAUSE_CONT = 0
+
+# libcurl groups options by the type of their values, see CURLOPTTYPE_* in curl.h
+CURLOPTTYPE_LONG = 0
+CURLOPTTYPE_OBJECTPOINT = 10000
+CURLOPTTYPE_FUNCTIONPOINT = 20000
+CURLOPTTYPE_OFF_T = 30000
+CURLOPTTYPE_BLOB = 40000
+
+# Value type of each option, looked up on every setopt call.
+_OPTION_TYPES = {option: option - option % 10000 for option in CurlOpt}
+
+CURL_BLOB_NOCOPY = 0
+CURL_BLOB_COPY = 1
+
+# Added in libcurl 7.87.0, not known to the bundled one yet.
+CURLOPT_CA_CACHE_TIMEOUT = 321
+CURLE_UNKNOWN_OPTION = 48
+
+CURLMSG_DONE = 1
+
+CURLSHOPT_SHARE = 1
+CURLSHOPT_UNSHARE = 2
+CURLSHOPT_LOCKFUNC = 3
+CURLSHOPT_UNLOCKFUNC = 4
+CURLSHOPT_USERDATA = 5
+
+CURL_LOCK_DATA_SHARE = 1
+CURL_LOCK_DATA_COOKIE = 2
+CURL_LOCK_DATA_DNS = 3
+CURL_LOCK_DATA_SSL_SESSION = 4
+CURL_LOCK_DATA_CONNECT = 5
+
+# Defaults of options which are not 0 or NULL, see Curl_init_userdefined in url.c,
+# used by incremental `Curl.reset` to revert the options set by a request.
+_OPTION_DEFAULTS = {
+    CurlOpt.SSL_VERIFYPEER: 1,
+    CurlOpt.SSL_VERIFYHOST: 2,
+    CurlOpt.PROXY_SSL_VERIFYPEER: 1,
+    CurlOpt.PROXY_SSL_VERIFYHOST: 2,
+    CurlOpt.DOH_SSL_VERIFYPEER: 1,
+    CurlOpt.DOH_SSL_VERIFYHOST: 2,
+    CurlOpt.MAXREDIRS: -1,
+    CurlOpt.POSTFIELDSIZE: -1,
+    CurlOpt.POSTFIELDSIZE_LARGE: -1,
+    CurlOpt.INFILESIZE: -1,
+    CurlOpt.INFILESIZE_LARGE: -1,
+    CurlOpt.NOPROGRESS: 1,
+    CurlOpt.TCP_NODELAY: 1,
+    CurlOpt.TCP_KEEPIDLE: 60,
+    CurlOpt.TCP_KEEPINTVL: 60,
+    CurlOpt.DNS_CACHE_TIMEOUT: 60,
+    CurlOpt.MAXCONNECTS: 5,
+    CurlOpt.MAXAGE_CONN: 118,
+    CurlOpt.BUFFERSIZE: 16384,
+    CurlOpt.UPLOAD_BUFFERSIZE: 65536,
+    CurlOpt.FTP_USE_EPSV: 1,
+    CurlOpt.NEW_FILE_PERMS: 0o644,
+    CurlOpt.NEW_DIRECTORY_PERMS: 0o755,
+    CurlOpt.EXPECT_100_TIMEOUT_MS: 1000,
+    CurlOpt.HAPPY_EYEBALLS_TIMEOUT_MS: 200,
+    CurlOpt.UPKEEP_INTERVAL_MS: 60000,
+    CurlOpt.HEADEROPT: 1,  # CURLHEADER_SEPARATE
+    CurlOpt.SOCKS5_AUTH: 5,  # CURLAUTH_BASIC | CURLAUTH_GSSAPI
+    CurlOpt.SSL_SESSIONID_CACHE: 1,
+    CurlOpt.STREAM_WEIGHT: 16,
+    CurlOpt.HTTP_VERSION: CurlHttpVersion.V2TLS,
+    CurlOpt.SSL_ENABLE_NPN: 1,
+    CurlOpt.SSL_ENABLE_ALPN: 1,
+    CurlOpt.SSL_ENABLE_TICKET: 1,
+}
+
+# Options altered by curl_easy_impersonate, it has to be applied again once any of
+# these is reverted.
+_IMPERSONATE_OPTIONS = frozenset(
+    [
+        CurlOpt.SSLVERSION,
+        CurlOpt.SSL_CIPHER_LIST,
+        CurlOpt.SSL_EC_CURVES,
+        CurlOpt.SSL_SIG_HASH_ALGS,
+        CurlOpt.SSL_CERT_COMPRESSION,
+        CurlOpt.SSL_ENABLE_NPN,
+        CurlOpt.SSL_ENABLE_ALPN,
+        CurlOpt.SSL_ENABLE_ALPS,
+        CurlOpt.SSL_ENABLE_TICKET,
+        CurlOpt.SSL_PERMUTE_EXTENSIONS,
+        CurlOpt.HTTP_VERSION,
+        CurlOpt.HTTP2_PSEUDO_HEADERS_ORDER,
+        CurlOpt.HTTP2_NO_SERVER_PUSH,
+        CurlOpt.HTTPBASEHEADER,
+    ]
+)
+
+# getinfo out parameter type and cast, by the type bits of the info.
+_INFO_TYPES = {
+    0x100000: "char**",
+    0x200000: "long*",
+    0x300000: "double*",
+    0x400000: "struct curl_slist **",
+    0x600000: "long long*",  # curl_off_t
+}
+_INFO_CASTS = {
+    0x100000: ffi.string,
+    0x200000: int,
+    0x300000: float,
+    0x600000: int,
+}
+
+# Options kept by incremental `Curl.reset`. COOKIELIST is a command, not a setting,
+# and unsetting COOKIEFILE would drop the cookie engine along with its cookies.
+_KEPT_OPTIONS = frozenset([CurlOpt.SHARE, CurlOpt.COOKIELIST, CurlOpt.COOKIEFILE])
 
 
 @ffi.def_extern()
@@ -50,7 +169,11 @@ def debug_function(curl, type: int, data, size, clientp) -> int:
 def buffer_callback(ptr, size, nmemb, userdata):
     # assert size == 1
     buffer = ffi.from_handle(userdata)
-    buffer.write(ffi.buffer(ptr, nmemb)[:])
+    if type(buffer) in _COPYING_BUFFERS:
+        # these copy the data themselves, no need for an intermediate bytes object.
+        buffer.write(ffi.buffer(ptr, nmemb))
+    else:
+        buffer.write(ffi.buffer(ptr, nmemb)[:])
     return nmemb * size
 
 def ensure_int(s):
@@ -72,6 +195,63 @@ def write_callback(ptr, size, nmemb, userdata):
     return nmemb * size
 
 
+# An exception must not be taken as the end of the body, abort the transfer instead.
+@ffi.def_extern(error=CURL_READFUNC_ABORT)
+def read_callback(buffer, size, nitems, userdata):
+    readinto = ffi.from_handle(userdata)
+    return readinto(ffi.buffer(buffer, size * nitems))
+
+
+@ffi.def_extern()
+def share_lock_function(curl, data: int, access: int, userptr):
+    share = ffi.from_handle(userptr)
+    share._locks[data].acquire()
+
+
+@ffi.def_extern()
+def share_unlock_function(curl, data: int, userptr):
+    share = ffi.from_handle(userptr)
+    share._locks[data].release()
+
+
+# Process-wide CA bundles. If libcurl can't cache the parsed store itself, each
+# bundle is read once and passed to all handles with CAINFO_BLOB, without copying.
+_ca_cache_supported: Optional[bool] = None
+_cacert_blobs: Dict[str, Any] = {}
+_cacert_lock = threading.Lock()
+
+
+def _get_cacert_blob(path: str):
+    """Returns a `struct curl_blob*` of the CA bundle at path, or None if unreadable."""
+    entry = _cacert_blobs.get(path)
+    if entry is None:
+        with _cacert_lock:
+            entry = _cacert_blobs.get(path)
+            if entry is None:
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    return None
+                # keep the buffer alive as long as the blob, libcurl does not copy it.
+                c_data = ffi.from_buffer(data)
+                blob = ffi.new(
+                    "struct curl_blob*", [c_data, len(data), CURL_BLOB_NOCOPY]
+                )
+                entry = _cacert_blobs[path] = (blob, c_data)
+    return entry[0]
+
+
+class _NullSink:
+    """Drops the body, installed by incremental `Curl.reset` in place of the last buffer."""
+
+    def write(self, data):
+        pass
+
+
+_null_sink_handle = ffi.new_handle(_NullSink())
+
+
 # Credits: @alexio777 on https://github.com/yifeikong/curl_cffi/issues/4
 def slist_to_list(head) -> List[bytes]:
     result = []
@@ -102,8 +282,15 @@ class Curl:
         self._write_handle = None
         self._header_handle = None
         self._body_handle = None
+        self._read_handle = None
+        self._mime = None
+        self._share = None
+        self._dirty = set()  # options set since the last reset
+        self._impersonation = None  # (target, default_headers) applied
+        self._cookie_state = None  # (jar, generation, hosts) loaded in the cookie engine
         # TODO: use CURL_ERROR_SIZE
         self._error_buffer = ffi.new("char[]", 256)
+        self._response_info = ffi.new("struct response_info*")
         self._debug = debug
         self._set_error_buffer()
 
@@ -112,7 +299,7 @@ class Curl:
         if ret != 0:
             warnings.warn("Failed to set error buffer")
         if self._debug:
-            self.setopt(CurlOpt.VERBOSE, 1)
+            lib._curl_easy_setopt_long(self._curl, CurlOpt.VERBOSE, 1)
             lib._curl_easy_setopt(self._curl, CurlOpt.DEBUGFUNCTION, lib.debug_function)
 
     def __del__(self):
@@ -141,20 +328,17 @@ class Curl:
             option: option to set, use the constants from CurlOpt enum
             value: value to set, strings will be handled automatically
         """
-        input_option = {
-            # this should be int in curl, but cffi requires pointer for void*
-            # it will be convert back in the glue c code.
-            0: "int*",
-            10000: "char*",
-            20000: "void*",
-            30000: "int*",  # offset type
-        }
-        # print("option", option, "value", value)
+        value_type = _OPTION_TYPES.get(option)
+        if value_type is None:
+            value_type = option - option % 10000
 
-        # Convert value
-        value_type = input_option.get(int(option / 10000) * 10000)
-        if value_type == "int*":
-            c_value = ffi.new("int*", value)
+        if value_type == CURLOPTTYPE_LONG or value_type == CURLOPTTYPE_OFF_T:
+            return self.setopt_int(option, value)
+        elif option == CurlOpt.WRITEDATA and isinstance(value, FdWriter):
+            # written from C, no python call per chunk.
+            c_value = value._writer
+            self._write_handle = value
+            lib._curl_easy_setopt(self._curl, CurlOpt.WRITEFUNCTION, _fd_write_callback)
         elif option == CurlOpt.WRITEDATA:
             c_value = ffi.new_handle(value)
             self._write_handle = c_value
@@ -175,56 +359,141 @@ class Curl:
         elif option == CurlOpt.HEADERFUNCTION:
             c_value = ffi.new_handle(value)
             self._header_handle = c_value
-            lib._curl_easy_setopt(self._curl, CurlOpt.WRITEFUNCTION, lib.write_callback)
+            lib._curl_easy_setopt(self._curl, CurlOpt.HEADERFUNCTION, lib.write_callback)
             option = CurlOpt.HEADERDATA
-        elif value_type == "char*":
-            if isinstance(value, str):
-                c_value = value.encode()
-            else:
-                c_value = value
-            # Must keep a reference, otherwise may be GCed.
-            if option == CurlOpt.POSTFIELDS:
-                self._body_handle = c_value
-        else:
-            raise NotImplementedError("Option unsupported: %s" % option)
-
-        if option == CurlOpt.HTTPHEADER:
+        elif option == CurlOpt.READDATA:
+            # a file object opened in binary mode, the body is read into curl's buffer.
+            c_value = ffi.new_handle(value.readinto)
+            self._read_handle = c_value
+            lib._curl_easy_setopt(self._curl, CurlOpt.READFUNCTION, lib.read_callback)
+        elif option == CurlOpt.READFUNCTION:
+            # same as readinto: fill the given buffer, return the size, 0 at the end.
+            c_value = ffi.new_handle(value)
+            self._read_handle = c_value
+            lib._curl_easy_setopt(self._curl, CurlOpt.READFUNCTION, lib.read_callback)
+            option = CurlOpt.READDATA
+        elif option == CurlOpt.MIMEPOST:
+            # libcurl reads the parts during the transfer, keep the form alive until then.
+            self._mime = value
+            c_value = value._form if value is not None else ffi.NULL
+        elif option == CurlOpt.SHARE:
+            # Keep a reference, the share must outlive all the handles using it.
+            self._share = value
+            c_value = value._share if value is not None else ffi.NULL
+        elif option == CurlOpt.HTTPHEADER:
             for header in value:
                 self._headers = lib.curl_slist_append(self._headers, header)
-            ret = lib._curl_easy_setopt(self._curl, option, self._headers)
+            c_value = self._headers
         elif option == CurlOpt.RESOLVE:
             for resolve in value:
                 if isinstance(resolve, str):
                     resolve = resolve.encode()
                 self._resolve = lib.curl_slist_append(self._resolve, resolve)
-            ret = lib._curl_easy_setopt(self._curl, option, self._resolve)
+            c_value = self._resolve
+        elif value_type == CURLOPTTYPE_OBJECTPOINT:
+            return self.setopt_str(option, value)
+        elif value_type == CURLOPTTYPE_BLOB:
+            # libcurl copies the data, the blob is only needed during the call.
+            c_data = ffi.from_buffer(value)
+            c_value = ffi.new("struct curl_blob*", [c_data, len(value), CURL_BLOB_COPY])
         else:
-            ret = lib._curl_easy_setopt(self._curl, option, c_value)
-        self._check_error(ret, "setopt", option, value)
+            raise NotImplementedError("Option unsupported: %s" % option)
+
+        return self.setopt_ptr(option, c_value)
+
+    def setopt_int(self, option: CurlOpt, value: int) -> int:
+        """Fast path of `setopt` for integer options, i.e. long and curl_off_t values.
+
+        Parameters:
+            option: option to set, use the constants from CurlOpt enum
+            value: integer value to set
+        """
+        self._dirty.add(option)
+        if option >= CURLOPTTYPE_OFF_T:
+            ret = lib._curl_easy_setopt_off_t(self._curl, option, value)
+        else:
+            ret = lib._curl_easy_setopt_long(self._curl, option, value)
+        if ret != 0:
+            self._check_error(ret, "setopt", option, value)
+        return ret
+
+    def setopt_str(self, option: CurlOpt, value: Union[str, bytes]) -> int:
+        """Fast path of `setopt` for string options.
 
+        Parameters:
+            option: option to set, use the constants from CurlOpt enum
+            value: str or bytes value to set, str will be encoded as utf-8
+        """
+        c_value = value.encode() if isinstance(value, str) else value
+        # Must keep a reference, otherwise may be GCed.
+        if option == CurlOpt.POSTFIELDS:
+            self._body_handle = c_value
+        self._dirty.add(option)
+        ret = lib._curl_easy_setopt(self._curl, option, c_value)
+        if ret != 0:
+            self._check_error(ret, "setopt", option, value)
         if option == CurlOpt.CAINFO:
+            # only trust the given bundle, not the shared one.
+            lib._curl_easy_setopt(self._curl, CurlOpt.CAINFO_BLOB, ffi.NULL)
             self._is_cert_set = True
+        return ret
 
+    def setopt_ptr(self, option: CurlOpt, value: Any) -> int:
+        """Fast path of `setopt` for raw pointers, e.g. cdata objects or callbacks.
+        The caller is responsible for keeping the pointed memory alive.
+
+        Parameters:
+            option: option to set, use the constants from CurlOpt enum
+            value: pointer to set
+        """
+        self._dirty.add(option)
+        ret = lib._curl_easy_setopt(self._curl, option, value)
+        if ret != 0:
+            self._check_error(ret, "setopt", option, value)
         return ret
 
+    def setopts(self, options: Dict[CurlOpt, Any]):
+        """Set multiple options in the given order. Consecutive long options are
+        set with a single call into libcurl.
+
+        Parameters:
+            options: a dict of option to value, see `setopt`.
+        """
+        longs: List[Tuple[CurlOpt, int]] = []
+        for option, value in options.items():
+            if _OPTION_TYPES.get(option) == CURLOPTTYPE_LONG:
+                longs.append((option, value))
+                continue
+            if longs:
+                self._setopt_longs(longs)
+                longs = []
+            self.setopt(option, value)
+        if longs:
+            self._setopt_longs(longs)
+
+    def _setopt_longs(self, longs: List[Tuple[CurlOpt, int]]):
+        if len(longs) == 1:
+            self.setopt_int(*longs[0])
+            return
+        count = len(longs)
+        self._dirty.update(option for option, _ in longs)
+        c_options = ffi.new("int[]", [option for option, _ in longs])
+        c_values = ffi.new("long[]", [value for _, value in longs])
+        failed = ffi.new("int*")
+        ret = lib._curl_easy_setopt_longs(
+            self._curl, count, c_options, c_values, failed
+        )
+        if ret != 0:
+            self._check_error(ret, "setopt", *longs[failed[0]])
+
     def getinfo(self, option: CurlInfo) -> Union[bytes, int, float, List]:
         """Wrapper for curl_easy_getinfo. Gets information in response after curl perform.
 
         Parameters:
             option: option to get info of, use the constants from CurlInfo enum
         """
-        ret_option = {
-            0x100000: "char**",
-            0x200000: "long*",
-            0x300000: "double*",
-            0x400000: "struct curl_slist **",
-        }
-        ret_cast_option = {
-            0x100000: ffi.string,
-            0x200000: int,
-            0x300000: float,
-        }
-        c_value = ffi.new(ret_option[option & 0xF00000])
+        ret_cast_option = _INFO_CASTS
+        c_value = ffi.new(_INFO_TYPES[option & 0xF00000])
         ret = lib.curl_easy_getinfo(self._curl, option, c_value)
         self._check_error(ret, "getinfo", option)
         # cookielist and ssl_engines starts with 0x400000, see also: const.py
@@ -234,6 +503,25 @@ class Curl:
             return b""
         return ret_cast_option[option & 0xF00000](c_value[0])
 
+    def response_info(self) -> Tuple[int, int, int, float, bytes, bytes]:
+        """Infos of the last response with a single call into libcurl.
+
+        Returns:
+            a tuple of (status_code, http_version, redirect_count, total_time,
+            effective_url, redirect_url).
+        """
+        info = self._response_info
+        ret = lib._curl_easy_getinfo_response(self._curl, info)
+        self._check_error(ret, "getinfo", "response")
+        return (
+            info.status_code,
+            info.http_version,
+            info.redirect_count,
+            info.total_time,
+            ffi.string(info.effective_url) if info.effective_url else b"",
+            ffi.string(info.redirect_url) if info.redirect_url else b"",
+        )
+
     def version(self) -> bytes:
         """Get the underlying libcurl version."""
         return ffi.string(lib.curl_version())
@@ -245,14 +533,53 @@ class Curl:
             target: browser to impersonate.
             default_headers: whether to add default headers, like User-Agent.
         """
-        return lib.curl_easy_impersonate(
+        if self._impersonation == (target, default_headers):
+            # already applied, incremental resets keep it.
+            return 0
+        if self._impersonation is not None:
+            self._clear_impersonation()
+        ret = lib.curl_easy_impersonate(
             self._curl, target.encode(), int(default_headers)
         )
+        if ret == 0:
+            self._impersonation = (target, default_headers)
+        return ret
+
+    def _clear_impersonation(self):
+        for option in _IMPERSONATE_OPTIONS:
+            self._revert_option(option)
+        self._impersonation = None
+
+    def pause(self, bitmask: int = CURLPAUSE_ALL):
+        """Wrapper for curl_easy_pause, pause or unpause(`CURLPAUSE_CONT`) the transfer.
+
+        Unpausing delivers the data held back by `CURL_WRITEFUNC_PAUSE` right away.
+        """
+        ret = lib.curl_easy_pause(self._curl, bitmask)
+        self._check_error(ret, "pause", bitmask)
 
     def _ensure_cacert(self):
         if not self._is_cert_set:
-            ret = self.setopt(CurlOpt.CAINFO, self._cacert)
-            self._check_error(ret, "set cacert")
+            self._set_default_cacert()
+            self._is_cert_set = True
+
+    def _set_default_cacert(self):
+        """Set the CA bundle shared by the whole process, see `_get_cacert_blob`."""
+        global _ca_cache_supported
+        if _ca_cache_supported is None:
+            ret = lib._curl_easy_setopt_long(
+                self._curl, CURLOPT_CA_CACHE_TIMEOUT, 86400
+            )
+            _ca_cache_supported = ret == 0
+        blob = None if _ca_cache_supported else _get_cacert_blob(self._cacert)
+        if blob is None:
+            # libcurl caches the parsed store itself, or the bundle is unreadable.
+            ret = lib._curl_easy_setopt(self._curl, CurlOpt.CAINFO, self._cacert.encode())
+        else:
+            # otherwise the default path would be loaded as well.
+            lib._curl_easy_setopt(self._curl, CurlOpt.CAINFO, ffi.NULL)
+            ret = lib._curl_easy_setopt(self._curl, CurlOpt.CAINFO_BLOB, blob)
+        self._check_error(ret, "set cacert")
 
     def perform(self, clear_headers: bool = True):
         """Wrapper for curl_easy_perform, performs a curl request.
@@ -277,6 +604,9 @@ class Curl:
         self._write_handle = None
         self._header_handle = None
         self._body_handle = None
+        self._read_handle = None
+        # freeing the form also detaches it from the handle.
+        self._mime = None
         if clear_headers:
             if self._headers != ffi.NULL:
                 lib.curl_slist_free_all(self._headers)
@@ -287,16 +617,71 @@ class Curl:
         handle is not copied, you have to set them again."""
         new_handle = lib.curl_easy_duphandle(self._curl)
         c = Curl(cacert=self._cacert, debug=self._debug, handle=new_handle)
+        if self._share is not None:
+            c.setopt(CurlOpt.SHARE, self._share)
+        c._dirty = set(self._dirty)
+        c._impersonation = self._impersonation
         return c
 
-    def reset(self):
-        """Reset all curl options, wrapper for curl_easy_reset."""
-        self._is_cert_set = False
-        if self._curl is not None:
-            lib.curl_easy_reset(self._curl)
-            self._set_error_buffer()
+    def reset(self, incremental: bool = False):
+        """Reset curl options, wrapper for curl_easy_reset.
+
+        Parameters:
+            incremental: only revert the options set since the last reset, so that
+                the CA store, impersonation and HTTP/2 settings stay on the handle.
+                If no write callback is set afterwards, the body is discarded instead
+                of being written to stdout.
+        """
+        if not incremental or self._curl is None:
+            self._is_cert_set = False
+            if self._curl is not None:
+                lib.curl_easy_reset(self._curl)
+                self._set_error_buffer()
+            self._resolve = ffi.NULL
+            self._dirty = set()
+            self._impersonation = None
+            return
+
+        dirty = self._dirty
+        self._dirty = set()
+        for option in dirty:
+            self._revert_option(option)
+        # reverting POSTFIELDS or NOBODY may leave another method behind.
+        lib._curl_easy_setopt_long(self._curl, CurlOpt.HTTPGET, 1)
+        if self._impersonation is not None and not dirty.isdisjoint(
+            _IMPERSONATE_OPTIONS
+        ):
+            target, default_headers = self._impersonation
+            lib.curl_easy_impersonate(self._curl, target.encode(), int(default_headers))
         self._resolve = ffi.NULL
 
+    def _revert_option(self, option: CurlOpt):
+        if option in _KEPT_OPTIONS:
+            return
+        value_type = _OPTION_TYPES.get(option)
+        if value_type is None:
+            value_type = option - option % 10000
+
+        if value_type == CURLOPTTYPE_LONG:
+            lib._curl_easy_setopt_long(self._curl, option, _OPTION_DEFAULTS.get(option, 0))
+        elif value_type == CURLOPTTYPE_OFF_T:
+            lib._curl_easy_setopt_off_t(self._curl, option, _OPTION_DEFAULTS.get(option, 0))
+        elif option == CurlOpt.WRITEDATA:
+            lib._curl_easy_setopt(self._curl, CurlOpt.WRITEFUNCTION, lib.buffer_callback)
+            lib._curl_easy_setopt(self._curl, CurlOpt.WRITEDATA, _null_sink_handle)
+        elif option == CurlOpt.HEADERDATA:
+            lib._curl_easy_setopt(self._curl, CurlOpt.HEADERFUNCTION, ffi.NULL)
+            lib._curl_easy_setopt(self._curl, CurlOpt.HEADERDATA, ffi.NULL)
+        elif option == CurlOpt.READDATA:
+            lib._curl_easy_setopt(self._curl, CurlOpt.READFUNCTION, ffi.NULL)
+            lib._curl_easy_setopt(self._curl, CurlOpt.READDATA, ffi.NULL)
+            self._read_handle = None
+        elif option == CurlOpt.CAINFO:
+            # back to the shared CA bundle, instead of no bundle at all.
+            self._set_default_cacert()
+        else:
+            lib._curl_easy_setopt(self._curl, option, ffi.NULL)
+
     def parse_cookie_headers(self, headers: List[bytes]) -> SimpleCookie:
         """Extract cookies.SimpleCookie from header lines.
 
@@ -342,5 +727,349 @@ class Curl:
         if self._curl:
             lib.curl_easy_cleanup(self._curl)
             self._curl = None
-        ffi.release(self._error_buffer)
+            ffi.release(self._error_buffer)
         self._resolve = ffi.NULL
+
+
+# largest body preallocated from the Content-Length of a response
+_MAX_PREALLOCATION = 16 * 1024 * 1024
+
+
+class ContentBuffer:
+    """
+    A body sink to be used with `CurlOpt.WRITEDATA`.
+
+    Chunks from curl are copied straight into one growable bytearray, which is
+    preallocated from the Content-Length of the response when it's known, up to 16MiB.
+    """
+
+    __slots__ = ("_curl", "_buffer", "_size")
+
+    def __init__(self, curl: Optional["Curl"] = None):
+        """
+        Parameters:
+            curl: the curl handle performing, used to read the Content-Length.
+        """
+        self._curl = curl
+        self._buffer: Optional[bytearray] = None
+        self._size = 0
+
+    def _allocate(self) -> bytearray:
+        length = -1
+        if self._curl is not None:
+            length = cast(int, self._curl.getinfo(CurlInfo.CONTENT_LENGTH_DOWNLOAD_T))
+        # -1 when unknown, it's also just a hint when the body is compressed. It's
+        # announced by the server, so only trust it up to a limit, and grow past that.
+        if length > 0:
+            return bytearray(min(length, _MAX_PREALLOCATION))
+        return bytearray()
+
+    def write(self, data) -> int:
+        if self._buffer is None:
+            # The first chunk arrives after the headers, when the length is known.
+            self._buffer = self._allocate()
+        end = self._size + len(data)
+        # In place copy inside the preallocated area, appending beyond it.
+        self._buffer[self._size : end] = data
+        self._size = end
+        return len(data)
+
+    def getbuffer(self) -> memoryview:
+        """Return a zero-copy view of the received content."""
+        if self._buffer is None:
+            return memoryview(b"")
+        return memoryview(self._buffer)[: self._size]
+
+    def getvalue(self) -> bytes:
+        """Return the received content, this is the only copy of the data."""
+        if self._buffer is None:
+            return b""
+        if self._size == len(self._buffer):
+            return bytes(self._buffer)
+        with self.getbuffer() as view:
+            return view.tobytes()
+
+
+_COPYING_BUFFERS = (BytesIO, ContentBuffer)
+
+_fd_write_callback = ffi.addressof(lib, "_fd_write_callback")
+
+
+class FdWriter:
+    """
+    A body sink to be used with `CurlOpt.WRITEDATA`, which writes to a file descriptor.
+
+    The chunks are written by a C callback, without going through python at all.
+    """
+
+    __slots__ = ("_writer",)
+
+    def __init__(self, fd: int):
+        """
+        Parameters:
+            fd: file descriptor to write to, at its current position.
+        """
+        self._writer = ffi.new("struct fd_writer*")
+        self._writer.fd = fd
+
+    @property
+    def written(self) -> int:
+        """Number of bytes written to the file so far."""
+        return self._writer.written
+
+    @property
+    def discard(self) -> bool:
+        """Whether the received data is dropped instead of written."""
+        return bool(self._writer.discard)
+
+    @discard.setter
+    def discard(self, value: bool):
+        self._writer.discard = int(value)
+
+    def check_error(self):
+        """Raise the OSError of the last failed write, if any."""
+        if self._writer.error:
+            raise OSError(self._writer.error, os.strerror(self._writer.error))
+
+
+class CurlMime:
+    """
+    Wrapper for `curl_mime_*` functions of libcurl, a multipart/form-data body.
+
+    Parts are read by libcurl during the transfer: files from disk by their path, file
+    objects through the read callback, so the encoded body is never held in memory.
+    Set it with `curl.setopt(CurlOpt.MIMEPOST, mime)`.
+    """
+
+    def __init__(self, curl: Curl):
+        """
+        Parameters:
+            curl: the curl handle the form will be used with.
+        """
+        self._form = lib.curl_mime_init(curl._curl)
+        self._read_handles: List[Any] = []  # handles of the read callbacks
+
+    def __del__(self):
+        self.close()
+
+    def _check_error(self, errcode: int, action: str):
+        if errcode != 0:
+            raise CurlError(f"Failed to {action}, ErrCode: {errcode}", code=errcode)
+
+    def addpart(
+        self,
+        name: str,
+        *,
+        content_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        local_path: Optional[Union[str, bytes, os.PathLike]] = None,
+        data: Any = None,
+        size: int = -1,
+        headers: Optional[List[str]] = None,
+    ):
+        """Add a part to the form.
+
+        Parameters:
+            name: name of the field.
+            content_type: content type of the part, e.g. `image/png`.
+            filename: file name sent for the part, by default the name of `local_path`.
+            local_path: path of a file to send, read by libcurl itself.
+            data: bytes, copied into the form, or a file object opened in binary mode,
+                which is read in chunks with `readinto` during the transfer.
+            size: size of a file object, -1 if unknown.
+            headers: extra header lines of the part.
+        """
+        part = lib.curl_mime_addpart(self._form)
+        self._check_error(lib.curl_mime_name(part, name.encode()), "set mime name")
+        if local_path is not None:
+            ret = lib.curl_mime_filedata(part, os.fsencode(local_path))
+            self._check_error(ret, "set mime file")
+        elif isinstance(data, (str, bytes)):
+            if isinstance(data, str):
+                data = data.encode()
+            self._check_error(lib.curl_mime_data(part, data, len(data)), "set mime data")
+        elif data is not None:
+            handle = ffi.new_handle(data.readinto)
+            self._read_handles.append(handle)
+            ret = lib.curl_mime_data_cb(
+                part, size, lib.read_callback, ffi.NULL, ffi.NULL, handle
+            )
+            self._check_error(ret, "set mime data callback")
+        if filename is not None:
+            ret = lib.curl_mime_filename(part, filename.encode())
+            self._check_error(ret, "set mime filename")
+        if content_type is not None:
+            ret = lib.curl_mime_type(part, content_type.encode())
+            self._check_error(ret, "set mime type")
+        if headers:
+            slist = ffi.NULL
+            for header in headers:
+                slist = lib.curl_slist_append(slist, header.encode())
+            # the list is freed with the part.
+            self._check_error(lib.curl_mime_headers(part, slist, 1), "set mime headers")
+
+    def close(self):
+        """Free the form, wrapper for curl_mime_free."""
+        if self._form:
+            lib.curl_mime_free(self._form)
+            self._form = None
+            self._read_handles = []
+
+
+class CurlShare:
+    """
+    Wrapper for `curl_share_*` functions of libcurl.
+
+    Curl handles attached to the same share object reuse each other's DNS cache and
+    TLS sessions, even when they are used from different threads, and optionally
+    their connections. Cookies are not shared, since they are synced per request by
+    the sessions.
+    """
+
+    def __init__(
+        self, connections: bool = False, dns: bool = True, ssl_sessions: bool = True
+    ):
+        """
+        Parameters:
+            connections: whether to share the connection pool. libcurl does not support
+                it for handles performing concurrently in different threads, only turn
+                it on when the handles are used from one thread at a time.
+            dns: whether to share the DNS cache.
+            ssl_sessions: whether to share the TLS session cache.
+        """
+        self._share = lib.curl_share_init()
+        # libcurl asks for a lock for each kind of shared data, including the share
+        # object itself, locks are taken and released from the threads performing.
+        self._locks = {
+            data: threading.Lock()
+            for data in range(CURL_LOCK_DATA_SHARE, CURL_LOCK_DATA_CONNECT + 1)
+        }
+        self._self_handle = ffi.new_handle(self)
+        self.setopt(CURLSHOPT_LOCKFUNC, lib.share_lock_function)
+        self.setopt(CURLSHOPT_UNLOCKFUNC, lib.share_unlock_function)
+        self.setopt(CURLSHOPT_USERDATA, self._self_handle)
+        if dns:
+            self.setopt(CURLSHOPT_SHARE, CURL_LOCK_DATA_DNS)
+        if ssl_sessions:
+            self.setopt(CURLSHOPT_SHARE, CURL_LOCK_DATA_SSL_SESSION)
+        if connections:
+            self.setopt(CURLSHOPT_SHARE, CURL_LOCK_DATA_CONNECT)
+
+    def __del__(self):
+        self.close()
+
+    def setopt(self, option: int, value: Any):
+        """Wrapper for curl_share_setopt.
+
+        Parameters:
+            option: option to set, one of the `CURLSHOPT_*` constants.
+            value: value to set.
+        """
+        if option in (CURLSHOPT_SHARE, CURLSHOPT_UNSHARE):
+            c_value = ffi.new("int*", value)
+        else:
+            c_value = value
+        ret = lib._curl_share_setopt(self._share, option, c_value)
+        if ret != 0:
+            raise CurlError(f"Failed to set share option {option}, ErrCode: {ret}", ret)
+        return ret
+
+    def close(self):
+        """Cleanup the share object, wrapper for curl_share_cleanup. Only succeeds
+        after all the curl handles using it are closed."""
+        if self._share:
+            # CURLSHE_IN_USE, some handles are still attached, try again later.
+            if lib.curl_share_cleanup(self._share) == 0:
+                self._share = None
+
+
+class CurlMulti:
+    """
+    Wrapper for `curl_multi_*` functions of libcurl, drives many transfers on the
+    calling thread with `curl_multi_perform` and `curl_multi_poll`. See `AsyncCurl`
+    for asyncio.
+    """
+
+    def __init__(self):
+        self._curlm = lib.curl_multi_init()
+        self._curls: Dict[Any, Curl] = {}  # c curl to Curl
+        self._running = ffi.new("int*")
+        self._numfds = ffi.new("int*")
+        self._msg_in_queue = ffi.new("int*")
+
+    def __del__(self):
+        self.close()
+
+    def __len__(self):
+        return len(self._curls)
+
+    def _check_error(self, errcode: int, action: str):
+        if errcode != 0:
+            raise CurlError(f"Failed to {action}, CURLMcode: {errcode}.", code=errcode)
+
+    def setopt(self, option: CurlMOpt, value: Any):
+        """Wrapper for curl_multi_setopt."""
+        if option < CURLOPTTYPE_OBJECTPOINT:
+            ret = lib._curl_multi_setopt_long(self._curlm, option, value)
+        else:
+            ret = lib.curl_multi_setopt(self._curlm, option, value)
+        self._check_error(ret, "setopt")
+
+    def add_handle(self, curl: Curl):
+        """Add a curl handle, its transfer starts on the next `perform`."""
+        curl._ensure_cacert()
+        ret = lib.curl_multi_add_handle(self._curlm, curl._curl)
+        self._check_error(ret, "add_handle")
+        self._curls[curl._curl] = curl
+
+    def remove_handle(self, curl: Curl):
+        """Remove a curl handle, aborting its transfer if not finished."""
+        if self._curls.pop(curl._curl, None) is not None:
+            lib.curl_multi_remove_handle(self._curlm, curl._curl)
+
+    def perform(self) -> int:
+        """Wrapper for curl_multi_perform, returns the number of running transfers."""
+        ret = lib.curl_multi_perform(self._curlm, self._running)
+        self._check_error(ret, "perform")
+        return self._running[0]
+
+    def poll(self, timeout_ms: int = 1000) -> int:
+        """Wrapper for curl_multi_poll, waits until there is something to do or the
+        timeout expires. Returns the number of file descriptors with activity."""
+        ret = lib.curl_multi_poll(self._curlm, ffi.NULL, 0, timeout_ms, self._numfds)
+        self._check_error(ret, "poll")
+        return self._numfds[0]
+
+    def wakeup(self):
+        """Wrapper for curl_multi_wakeup, interrupts a `poll` from another thread."""
+        ret = lib.curl_multi_wakeup(self._curlm)
+        self._check_error(ret, "wakeup")
+
+    def info_read(self) -> List[Tuple[Curl, Optional[CurlError]]]:
+        """Collect the finished transfers, and remove their handles.
+
+        Returns:
+            A list of (curl, error) tuples, error is None if the transfer succeeded.
+        """
+        done = []
+        while True:
+            curl_msg = lib.curl_multi_info_read(self._curlm, self._msg_in_queue)
+            if curl_msg == ffi.NULL:
+                break
+            if curl_msg.msg == CURLMSG_DONE:
+                easy_handle = curl_msg.easy_handle
+                retcode = curl_msg.data.result
+                # curl_msg is invalid after the handle is removed.
+                curl = self._curls.pop(easy_handle)
+                lib.curl_multi_remove_handle(self._curlm, easy_handle)
+                done.append((curl, curl._get_error(retcode, "perform")))
+        return done
+
+    def close(self):
+        """Remove all the handles and cleanup, wrapper for curl_multi_cleanup."""
+        if self._curlm:
+            for easy_handle in self._curls:
+                lib.curl_multi_remove_handle(self._curlm, easy_handle)
+            self._curls = {}
+            lib.curl_multi_cleanup(self._curlm)
+            self._curlm = None
@@ -1,12 +1,25 @@
 // easy interfaces
 void *curl_easy_init();
 int _curl_easy_setopt(void *curl, int option, void *param);
+int _curl_easy_setopt_long(void *curl, int option, long value);
+int _curl_easy_setopt_off_t(void *curl, int option, long long value);
+int _curl_easy_setopt_longs(void *curl, int count, int *options, long *values, int *failed);
 int curl_easy_getinfo(void *curl, int option, void *ret);
 int curl_easy_perform(void *curl);
 void curl_easy_cleanup(void *curl);
 void curl_easy_reset(void *curl);
 int curl_easy_impersonate(void *curl, char *target, int default_headers);
 void *curl_easy_duphandle(void *curl);
+int curl_easy_pause(void *curl, int bitmask);
+struct response_info {
+   long status_code;
+   long http_version;
+   long redirect_count;
+   double total_time;
+   char *effective_url;
+   char *redirect_url;
+};
+int _curl_easy_getinfo_response(void *curl, struct response_info *info);
 
 char *curl_version();
 
@@ -18,11 +31,49 @@ struct curl_slist {
 struct curl_slist *curl_slist_append(struct curl_slist *list, char *string);
 void curl_slist_free_all(struct curl_slist *list);
 
+// blob options
+struct curl_blob {
+   void *data;
+   size_t len;
+   unsigned int flags;
+};
+
+// mime interfaces
+void *curl_mime_init(void *curl);
+void *curl_mime_addpart(void *mime);
+int curl_mime_name(void *part, char *name);
+int curl_mime_filename(void *part, char *filename);
+int curl_mime_type(void *part, char *mimetype);
+int curl_mime_data(void *part, char *data, size_t datasize);
+int curl_mime_filedata(void *part, char *filename);
+int curl_mime_data_cb(void *part, long long datasize, void *readfunc, void *seekfunc, void *freefunc, void *arg);
+int curl_mime_headers(void *part, struct curl_slist *headers, int take_ownership);
+void curl_mime_free(void *mime);
+
+// a body sink writing to a file descriptor from C
+struct fd_writer {
+   int fd;
+   int discard;
+   int error;
+   long long written;
+};
+size_t _fd_write_callback(char *ptr, size_t size, size_t nmemb, void *userdata);
+
 // callbacks
 extern "Python" size_t buffer_callback(void *ptr, size_t size, size_t nmemb, void *userdata);
 extern "Python" size_t write_callback(void *ptr, size_t size, size_t nmemb, void *userdata);
+extern "Python" size_t read_callback(char *buffer, size_t size, size_t nitems, void *userdata);
 extern "Python" int debug_function(void *curl, int type, char *data, size_t size, void *clientp);
 
+// share interfaces
+void *curl_share_init();
+int _curl_share_setopt(void *share, int option, void *param);
+int curl_share_cleanup(void *share);
+
+// share callbacks
+extern "Python" void share_lock_function(void *curl, int data, int access, void *userptr);
+extern "Python" void share_unlock_function(void *curl, int data, void *userptr);
+
 // multi interfaces
 struct CURLMsg {
    int msg;       /* what this message means */
@@ -38,8 +89,12 @@ int curl_multi_add_handle(void *curlm, void *curl);
 int curl_multi_remove_handle(void *curlm, void *curl);
 int curl_multi_socket_action(void *curlm, int sockfd, int ev_bitmask, int *running_handle);
 int curl_multi_setopt(void *curlm, int option, void* param);
+int _curl_multi_setopt_long(void *curlm, int option, long value);
 int curl_multi_assign(void *curlm, int sockfd, void *sockptr);
 int curl_multi_perform(void *curlm, int *running_handle);
+int curl_multi_poll(void *curlm, void *extra_fds, unsigned int extra_nfds, int timeout_ms, int *numfds);
+int curl_multi_wait(void *curlm, void *extra_fds, unsigned int extra_nfds, int timeout_ms, int *numfds);
+int curl_multi_wakeup(void *curlm);
 struct CURLMsg *curl_multi_info_read(void* curlm, int *msg_in_queue);
 
 // multi callbacks
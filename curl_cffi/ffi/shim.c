@@ -1,6 +1,8 @@
 #include "shim.h"
 
 #define INTEGER_OPTION_MAX 10000
+#define OFF_T_OPTION_MIN 30000
+#define OFF_T_OPTION_MAX 40000
 
 int _curl_easy_setopt(void* curl, int option, void* parameter) {
     // printf("****** hijack test begins: \n");
@@ -12,5 +14,86 @@ int _curl_easy_setopt(void* curl, int option, void* parameter) {
     if (option < INTEGER_OPTION_MAX) {
         return (int)curl_easy_setopt(curl, (CURLoption)option, *(int*)parameter);
     }
+    // offset options take a curl_off_t, which is wider than int
+    if (option >= OFF_T_OPTION_MIN && option < OFF_T_OPTION_MAX) {
+        return (int)curl_easy_setopt(curl, (CURLoption)option, (curl_off_t)*(long long*)parameter);
+    }
     return (int)curl_easy_setopt(curl, (CURLoption)option, parameter);
 }
+
+int _curl_easy_setopt_long(void* curl, int option, long value) {
+    return (int)curl_easy_setopt(curl, (CURLoption)option, value);
+}
+
+int _curl_easy_setopt_off_t(void* curl, int option, long long value) {
+    return (int)curl_easy_setopt(curl, (CURLoption)option, (curl_off_t)value);
+}
+
+int _curl_easy_setopt_longs(void* curl, int count, int* options, long* values, int* failed) {
+    // set a batch of long options, stops at the first error and reports its index.
+    int i;
+    int ret;
+    for (i = 0; i < count; i++) {
+        ret = (int)curl_easy_setopt(curl, (CURLoption)options[i], values[i]);
+        if (ret != 0) {
+            *failed = i;
+            return ret;
+        }
+    }
+    return 0;
+}
+
+int _curl_share_setopt(void* share, int option, void* parameter) {
+    // the data type to share/unshare is an int, passed in as a pointer like above.
+    if (option == CURLSHOPT_SHARE || option == CURLSHOPT_UNSHARE) {
+        return (int)curl_share_setopt(share, (CURLSHoption)option, *(int*)parameter);
+    }
+    return (int)curl_share_setopt(share, (CURLSHoption)option, parameter);
+}
+
+int _curl_multi_setopt_long(void* curlm, int option, long value) {
+    return (int)curl_multi_setopt(curlm, (CURLMoption)option, value);
+}
+
+size_t _fd_write_callback(char* ptr, size_t size, size_t nmemb, void* userdata) {
+    // write the whole chunk, a short count makes curl fail with CURLE_WRITE_ERROR.
+    struct fd_writer* writer = (struct fd_writer*)userdata;
+    size_t total = size * nmemb;
+    size_t done = 0;
+    long long n;
+    if (writer->discard) {
+        return total;
+    }
+    while (done < total) {
+#ifdef _WIN32
+        n = (long long)_write(writer->fd, ptr + done, (unsigned int)(total - done));
+#else
+        n = (long long)write(writer->fd, ptr + done, total - done);
+#endif
+        if (n < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            writer->error = errno;
+            break;
+        }
+        done += (size_t)n;
+    }
+    writer->written += (long long)done;
+    return done;
+}
+
+int _curl_easy_getinfo_response(void* curl, struct response_info* info) {
+    int ret;
+    ret = (int)curl_easy_getinfo(curl, CURLINFO_RESPONSE_CODE, &info->status_code);
+    if (ret != 0) return ret;
+    ret = (int)curl_easy_getinfo(curl, CURLINFO_HTTP_VERSION, &info->http_version);
+    if (ret != 0) return ret;
+    ret = (int)curl_easy_getinfo(curl, CURLINFO_REDIRECT_COUNT, &info->redirect_count);
+    if (ret != 0) return ret;
+    ret = (int)curl_easy_getinfo(curl, CURLINFO_TOTAL_TIME, &info->total_time);
+    if (ret != 0) return ret;
+    ret = (int)curl_easy_getinfo(curl, CURLINFO_EFFECTIVE_URL, &info->effective_url);
+    if (ret != 0) return ret;
+    return (int)curl_easy_getinfo(curl, CURLINFO_REDIRECT_URL, &info->redirect_url);
+}
@@ -1,7 +1,38 @@
 #include <stdlib.h>
 #include <string.h>
 #include <stdio.h>
+#include <errno.h>
+#ifdef _WIN32
+#include <io.h>
+#else
+#include <unistd.h>
+#endif
 #define CURL_STATICLIB
 #include "curl/curl.h"
 
 int _curl_easy_setopt(void* curl, int option, void* param);
+int _curl_easy_setopt_long(void* curl, int option, long value);
+int _curl_easy_setopt_off_t(void* curl, int option, long long value);
+int _curl_easy_setopt_longs(void* curl, int count, int* options, long* values, int* failed);
+int _curl_share_setopt(void* share, int option, void* param);
+int _curl_multi_setopt_long(void* curlm, int option, long value);
+
+// a body sink writing to a file descriptor, see `FdWriter`
+struct fd_writer {
+    int fd;
+    int discard;  // drop the data, e.g. the body of an error response
+    int error;  // errno of the failed write
+    long long written;
+};
+size_t _fd_write_callback(char* ptr, size_t size, size_t nmemb, void* userdata);
+
+// infos of the last response, read with one call, see `Curl.response_info`
+struct response_info {
+    long status_code;
+    long http_version;
+    long redirect_count;
+    double total_time;
+    char* effective_url;
+    char* redirect_url;
+};
+int _curl_easy_getinfo_response(void* curl, struct response_info* info);
@@ -12,21 +12,24 @@ __all__ = [
     "options",
     "RequestsError",
     "Cookies",
+    "IndexedCookieJar",
     "Headers",
     "Request",
     "Response",
+    "ServerSentEvent",
+    "RequestTemplate",
 ]
 
 from functools import partial
 from io import BytesIO
-from typing import Callable, Dict, Optional, Tuple, Union
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
 
 from ..const import CurlHttpVersion
-from .cookies import Cookies, CookieTypes
-from .models import Request, Response
+from .cookies import Cookies, CookieTypes, IndexedCookieJar
+from .models import Request, Response, ServerSentEvent
 from .errors import RequestsError
 from .headers import Headers, HeaderTypes
-from .session import AsyncSession, BrowserType, Session
+from .session import AsyncSession, BrowserType, RequestTemplate, Session
 
 # ThreadType = Literal["eventlet", "gevent", None]
 
@@ -35,7 +38,7 @@ def request(
     method: str,
     url: str,
     params: Optional[dict] = None,
-    data: Optional[Union[Dict[str, str], str, BytesIO, bytes]] = None,
+    data: Optional[Union[Dict[str, str], str, BytesIO, bytes, Iterable]] = None,
     json: Optional[dict] = None,
     headers: Optional[HeaderTypes] = None,
     cookies: Optional[CookieTypes] = None,
@@ -63,11 +66,15 @@ def request(
         method: http method for the request: GET/POST/PUT/DELETE etc.
         url: url for the requests.
         params: query string for the requests.
-        data: form values or binary data to use in body, `Content-Type: application/x-www-form-urlencoded` will be added if a dict is given.
+        data: form values or binary data to use in body, `Content-Type: application/x-www-form-urlencoded` will be added if a dict or a list of (key, value) tuples is given.
+            A file object opened in binary mode or an iterable of bytes is streamed in chunks,
+            with chunked transfer encoding if the size is unknown.
         json: json values to use in body, `Content-Type: application/json` will be added automatically.
         headers: headers to send.
         cookies: cookies to use.
-        files: not implemented yet.
+        files: files to upload as multipart/form-data, a dict of field name to a file object,
+            a path, the content, or a tuple of (filename, file object or content[, content_type[, headers]]).
+            Files on disk are read by libcurl itself, not loaded into memory.
         auth: HTTP basic auth, a tuple of (username, password), only basic auth is supported.
         timeout: how many seconds to wait before giving up.
         allow_redirects: whether to allow redirection.
@@ -2,11 +2,13 @@
 # which is licensed under the BSD License.
 # See https://github.com/encode/httpx/blob/master/LICENSE.md
 
-__all__ = ["Cookies"]
+__all__ = ["Cookies", "IndexedCookieJar"]
 
+import heapq
 import re
 import time
 import typing
+import zlib
 from http.cookiejar import Cookie, CookieJar
 from urllib.parse import urlparse
 from dataclasses import dataclass
@@ -74,7 +76,7 @@ class CurlMorsel:
             )
         return "\t".join(
             [
-                self.hostname,
+                "#HttpOnly_" + self.hostname if self.http_only else self.hostname,
                 self.dump_bool(self.subdomains),
                 self.path,
                 self.dump_bool(self.secure),
@@ -94,7 +96,7 @@ class CurlMorsel:
             path=cookie.path,
             secure=cookie.secure,
             expires=int(cookie.expires or 0),
-            http_only=False,
+            http_only=bool(cookie.get_nonstandard_attr("http_only")),
         )
 
     def to_cookiejar_cookie(self) -> Cookie:
@@ -123,9 +125,206 @@ class CurlMorsel:
         )
 
 
+class _TrackedJar(CookieJar):
+    """
+    A CookieJar which logs the keys of the cookies set or removed, so that only the
+    changes have to be synced to curl, see `Cookies.get_changes_for_curl`.
+
+    Every change bumps `generation`. When the log grows much longer than the jar, it's
+    dropped, and changes since earlier generations are unknown.
+    """
+
+    def __init__(self, policy=None):
+        super().__init__(policy)
+        self.generation = 0
+        self._log_start = 0  # generation of the first entry in the log
+        self._log: typing.List[typing.Tuple[str, str, str]] = []
+
+    def _touch(self, key: typing.Tuple[str, str, str]):
+        self._log.append(key)
+        self.generation += 1
+        # len() iterates the whole jar, only check once in a while.
+        if len(self._log) % 4096 == 0 and len(self._log) > 4 * len(self):
+            self._log_start = self.generation
+            self._log = []
+
+    def changes_since(
+        self, generation: int
+    ) -> typing.Optional[typing.List[typing.Tuple[str, str, str]]]:
+        """Keys (domain, path, name) changed after generation, None if unknown."""
+        with self._cookies_lock:
+            if generation < self._log_start:
+                return None
+            return self._log[generation - self._log_start :]
+
+    def set_cookie(self, cookie: Cookie):
+        with self._cookies_lock:
+            super().set_cookie(cookie)
+            self._touch((cookie.domain, cookie.path, cookie.name))
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            if name is not None:
+                super().clear(domain, path, name)
+                self._touch((domain, path, name))  # type: ignore
+                return
+            if domain is None:
+                removed = [(c.domain, c.path, c.name) for c in self]
+            elif path is None:
+                removed = [
+                    (domain, p, n)
+                    for p, cookies in self._cookies[domain].items()  # type: ignore
+                    for n in cookies
+                ]
+            else:
+                removed = [(domain, path, n) for n in self._cookies[domain][path]]  # type: ignore
+            super().clear(domain, path)
+            for key in removed:
+                self._touch(key)
+
+
+class _DomainNode:
+    __slots__ = ("children", "domains")
+
+    def __init__(self):
+        self.children: typing.Dict[str, "_DomainNode"] = {}
+        # cookie domains ending at this node, e.g. "example.com" and ".example.com"
+        self.domains: typing.Set[str] = set()
+
+
+class IndexedCookieJar(_TrackedJar):
+    """
+    A CookieJar indexed for large numbers of cookies across many domains.
+
+    Domains are kept in a trie of their reversed labels, so the cookies for a host are
+    found by walking its labels, instead of scanning the whole jar. Cookies are also
+    indexed by name, and expiration times are kept in a heap, so that clearing the
+    expired cookies does not scan the jar either.
+
+    Use it with ``Session(cookies=IndexedCookieJar())``. A session backed by this jar
+    only loads the cookies for the hosts it requests into curl, so cookies of other
+    domains are not sent after a cross-domain redirect.
+    """
+
+    def __init__(self, policy=None):
+        super().__init__(policy)
+        self._root = _DomainNode()
+        self._by_name: typing.Dict[str, typing.Set[typing.Tuple[str, str, str]]] = {}
+        self._expiry: typing.List[typing.Tuple[int, typing.Tuple[str, str, str]]] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _labels(domain: str) -> typing.List[str]:
+        return domain.lstrip(".").lower().split(".")[::-1]
+
+    def _index_domain(self, domain: str):
+        node = self._root
+        for label in self._labels(domain):
+            node = node.children.setdefault(label, _DomainNode())
+        node.domains.add(domain)
+
+    def _unindex_domain(self, domain: str):
+        path = [self._root]
+        labels = self._labels(domain)
+        for label in labels:
+            node = path[-1].children.get(label)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].domains.discard(domain)
+        # prune the nodes left without domains or children
+        for depth in range(len(labels), 0, -1):
+            if path[depth].domains or path[depth].children:
+                break
+            del path[depth - 1].children[labels[depth - 1]]
+
+    def _touch(self, key: typing.Tuple[str, str, str]):
+        domain, path, name = key
+        cookie = self._cookies.get(domain, {}).get(path, {}).get(name)  # type: ignore
+        keys = self._by_name.get(name)
+        indexed = keys is not None and key in keys
+        if cookie is not None:
+            if not indexed:
+                self._by_name.setdefault(name, set()).add(key)
+                self._count += 1
+                if domain:
+                    self._index_domain(domain)
+            if cookie.expires is not None:
+                heapq.heappush(self._expiry, (cookie.expires, key))
+                if len(self._expiry) > 2 * self._count + 64:
+                    self._rebuild_expiry()
+        elif indexed:
+            keys.discard(key)  # type: ignore
+            if not keys:
+                del self._by_name[name]
+            self._count -= 1
+            # CookieJar.clear leaves the emptied dicts behind
+            paths = self._cookies.get(domain)  # type: ignore
+            if paths is not None and not paths.get(path, True):
+                del paths[path]
+            if paths is not None and not paths:
+                del self._cookies[domain]  # type: ignore
+            if domain and domain not in self._cookies:  # type: ignore
+                self._unindex_domain(domain)
+        super()._touch(key)
+
+    def _rebuild_expiry(self):
+        # drop the entries left behind by cookies replaced or removed since
+        self._expiry = [
+            (c.expires, (c.domain, c.path, c.name))
+            for c in self
+            if c.expires is not None
+        ]
+        heapq.heapify(self._expiry)
+
+    def clear_expired_cookies(self):
+        now = time.time()
+        with self._cookies_lock:
+            expiry = self._expiry
+            while expiry and expiry[0][0] <= now:
+                expires, (domain, path, name) = heapq.heappop(expiry)
+                cookie = self._cookies.get(domain, {}).get(path, {}).get(name)  # type: ignore
+                # entries of replaced cookies are stale, skip them.
+                if cookie is not None and cookie.expires == expires:
+                    self.clear(domain, path, name)
+
+    def cookies_for_host(self, host: str) -> typing.List[Cookie]:
+        """Cookies which may be sent to host: the ones on its exact domain, on the
+        dotted domains it's a subdomain of, and the ones without a domain."""
+        result = []
+        with self._cookies_lock:
+            domains = [""] if "" in self._cookies else []  # type: ignore
+            labels = self._labels(host)
+            node = self._root
+            for depth, label in enumerate(labels, 1):
+                node = node.children.get(label)  # type: ignore
+                if node is None:
+                    break
+                exact = depth == len(labels)
+                domains.extend(d for d in node.domains if exact or d.startswith("."))
+            for domain in domains:
+                for cookies in self._cookies[domain].values():  # type: ignore
+                    result.extend(cookies.values())
+        return result
+
+    def cookies_named(self, name: str) -> typing.List[Cookie]:
+        """Cookies with the given name, on any domain and path."""
+        with self._cookies_lock:
+            return [
+                self._cookies[domain][path][name]  # type: ignore
+                for domain, path, name in self._by_name.get(name, ())
+            ]
+
+
 cut_port_re = re.compile(r":\d+$", re.ASCII)
 IPV4_RE = re.compile(r"\.\d+$", re.ASCII)
 
+_NETSCAPE_HEADER = "# Netscape HTTP Cookie File\n\n"
+_BINARY_MAGIC = b"CFFI-COOKIES\x00\x01"
+
 
 class Cookies(typing.MutableMapping[str, str]):
     """
@@ -134,16 +333,20 @@ class Cookies(typing.MutableMapping[str, str]):
 
     def __init__(self, cookies: typing.Optional[CookieTypes] = None) -> None:
         if cookies is None or isinstance(cookies, dict):
-            self.jar = CookieJar()
+            self.jar = _TrackedJar()
             if isinstance(cookies, dict):
                 for key, value in cookies.items():
                     self.set(key, value)
         elif isinstance(cookies, list):
-            self.jar = CookieJar()
+            self.jar = _TrackedJar()
             for key, value in cookies:
                 self.set(key, value)
         elif isinstance(cookies, Cookies):
-            self.jar = CookieJar()
+            # keep the backend, e.g. an IndexedCookieJar
+            jar_class = type(cookies.jar)
+            if not issubclass(jar_class, _TrackedJar):
+                jar_class = _TrackedJar
+            self.jar = jar_class()
             for cookie in cookies.jar:
                 self.jar.set_cookie(cookie)
         else:
@@ -166,12 +369,18 @@ class Cookies(typing.MutableMapping[str, str]):
         return host
 
     def get_cookies_for_curl(self, request) -> typing.List[CurlMorsel]:
-        """the process is similar to `cookiejar.add_cookie_header`, but load all cookies"""
+        """the process is similar to `cookiejar.add_cookie_header`, but load all
+        cookies, or with an `IndexedCookieJar`, all the cookies for the request host."""
         self.jar._cookies_lock.acquire()  # type: ignore
         morsels = []
         try:
             self.jar._policy._now = self._now = int(time.time())  # type: ignore
-            for cookie in self.jar:
+            if isinstance(self.jar, IndexedCookieJar):
+                host = urlparse(request.url).hostname or ""
+                cookies = self.jar.cookies_for_host(host)
+            else:
+                cookies = self.jar
+            for cookie in cookies:
                 morsel = CurlMorsel.from_cookiejar_cookie(cookie)
                 if not morsel.hostname:
                     morsel.hostname = self._eff_request_host(request)
@@ -182,11 +391,108 @@ class Cookies(typing.MutableMapping[str, str]):
         self.jar.clear_expired_cookies()
         return morsels
 
+    def get_changes_for_curl(
+        self, request, generation: int
+    ) -> typing.Tuple[typing.Optional[typing.List[CurlMorsel]], int]:
+        """Cookies changed since `generation`, removed ones as expired morsels, which
+        curl drops. Cookies without a domain are always included, for the request host.
+
+        Returns:
+            the morsels, None if the changes are unknown and all the cookies have to be
+            loaded, and the current generation.
+        """
+        jar = self.jar
+        if not isinstance(jar, _TrackedJar):
+            return None, 0
+        morsels = []
+        with jar._cookies_lock:
+            current = jar.generation
+            keys = jar.changes_since(generation)
+            if keys is None:
+                return None, current
+            for domain, path, name in dict.fromkeys(keys):
+                cookie = jar._cookies.get(domain, {}).get(path, {}).get(name)  # type: ignore
+                if not domain:
+                    if cookie is None:
+                        # was sent for some earlier request host, unknown here.
+                        return None, current
+                    continue  # sent for every request below
+                if cookie is not None:
+                    morsels.append(CurlMorsel.from_cookiejar_cookie(cookie))
+                else:
+                    morsels.append(
+                        CurlMorsel(
+                            name=name,
+                            value="",
+                            hostname=domain,
+                            subdomains=domain.startswith("."),
+                            path=path,
+                            expires=1,
+                        )
+                    )
+            host_cookies = jar._cookies.get("", {})  # type: ignore
+            if host_cookies:
+                host = self._eff_request_host(request)
+                for cookies in host_cookies.values():
+                    for cookie in cookies.values():
+                        morsel = CurlMorsel.from_cookiejar_cookie(cookie)
+                        morsel.hostname = host
+                        morsels.append(morsel)
+        return morsels, current
+
+    def save(self, path: str, binary: bool = False) -> None:
+        """Save the cookies to a file, which `load` restores.
+
+        Parameters:
+            path: file to write.
+            binary: write a zlib compressed file, much smaller for large jars,
+                instead of a Netscape cookie file, the format of curl's
+                ``COOKIEJAR`` and ``COOKIEFILE``.
+
+        Cookies without a domain are not saved, they are only bound to a host when
+        a request is sent.
+        """
+        lines = [_NETSCAPE_HEADER]
+        now = time.time()
+        with self.jar._cookies_lock:  # type: ignore
+            for cookie in self.jar:
+                if cookie.domain and not cookie.is_expired(now):
+                    morsel = CurlMorsel.from_cookiejar_cookie(cookie)
+                    lines.append(morsel.to_curl_format() + "\n")
+        content = "".join(lines).encode()
+        if binary:
+            content = _BINARY_MAGIC + zlib.compress(content)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    def load(self, path: str) -> None:
+        """Load the cookies from a file written by `save`, or a Netscape cookie file,
+        e.g. one saved by curl. Expired cookies are skipped."""
+        with open(path, "rb") as f:
+            content = f.read()
+        if content.startswith(_BINARY_MAGIC):
+            content = zlib.decompress(content[len(_BINARY_MAGIC) :])
+        now = int(time.time())
+        with self.jar._cookies_lock:  # type: ignore
+            for line in content.splitlines():
+                comment = line.startswith(b"#") and not line.startswith(b"#HttpOnly_")
+                if comment or not line.strip():
+                    continue
+                morsel = CurlMorsel.from_curl_format(line)
+                if not morsel.expires or morsel.expires > now:
+                    self.jar.set_cookie(morsel.to_cookiejar_cookie())
+
     def update_cookies_from_curl(self, morsels: typing.List[CurlMorsel]):
+        now = int(time.time())
         for morsel in morsels:
-            cookie = morsel.to_cookiejar_cookie()
-            self.jar.set_cookie(cookie)
-        self.jar.clear_expired_cookies()
+            if morsel.expires and morsel.expires <= now:
+                # removed by the response, e.g. with `Max-Age=0`
+                try:
+                    self.jar.clear(morsel.hostname, morsel.path, morsel.name)
+                except KeyError:
+                    pass
+            else:
+                self.jar.set_cookie(morsel.to_cookiejar_cookie())
 
     def set(
         self, name: str, value: str, domain: str = "", path: str = "/", secure=False
@@ -241,7 +547,7 @@ class Cookies(typing.MutableMapping[str, str]):
         """
         value = None
         matched_domain = ""
-        for cookie in self.jar:
+        for cookie in self._named(name):
             if cookie.name == name:
                 if domain is None or cookie.domain == domain:
                     if path is None or cookie.path == path:
@@ -279,7 +585,7 @@ class Cookies(typing.MutableMapping[str, str]):
 
         remove = [
             cookie
-            for cookie in self.jar
+            for cookie in self._named(name)
             if cookie.name == name
             and (domain is None or cookie.domain == domain)
             and (path is None or cookie.path == path)
@@ -288,6 +594,12 @@ class Cookies(typing.MutableMapping[str, str]):
         for cookie in remove:
             self.jar.clear(cookie.domain, cookie.path, cookie.name)
 
+    def _named(self, name: str) -> typing.Iterable[Cookie]:
+        """Cookies to look for name in, the whole jar unless it's indexed by name."""
+        if isinstance(self.jar, IndexedCookieJar):
+            return self.jar.cookies_named(name)
+        return self.jar
+
     def clear(
         self, domain: typing.Optional[str] = None, path: typing.Optional[str] = None
     ) -> None:
@@ -68,6 +68,8 @@ class Headers(typing.MutableMapping[str, str]):
     HTTP headers, as a case-insensitive multi-dict.
     """
 
+    __slots__ = ("_list", "_encoding", "_index", "_merged")
+
     def __init__(
         self,
         headers: typing.Optional[HeaderTypes] = None,
@@ -108,6 +110,38 @@ class Headers(typing.MutableMapping[str, str]):
             ]
 
         self._encoding = encoding
+        # built on demand, dropped on every change
+        self._index: typing.Optional[typing.Dict[bytes, typing.List[bytes]]] = None
+        self._merged: typing.Optional[typing.Dict[str, str]] = None
+
+    def _changed(self) -> None:
+        self._index = None
+        self._merged = None
+
+    def _values_index(self) -> typing.Dict[bytes, typing.List[bytes]]:
+        """Values of each lowercased key, in order."""
+        index = self._index
+        if index is None:
+            index = {}
+            for _, key, value in self._list:
+                if key in index:
+                    index[key].append(value)
+                else:
+                    index[key] = [value]
+            self._index = index
+        return index
+
+    def _merged_items(self) -> typing.Dict[str, str]:
+        """Decoded values of each lowercased key, joined with commas."""
+        merged = self._merged
+        if merged is None:
+            encoding = self.encoding
+            merged = {
+                key.decode(encoding): ", ".join(v.decode(encoding) for v in values)
+                for key, values in self._values_index().items()
+            }
+            self._merged = merged
+        return merged
 
     @property
     def encoding(self) -> str:
@@ -137,6 +171,7 @@ class Headers(typing.MutableMapping[str, str]):
     @encoding.setter
     def encoding(self, value: str) -> None:
         self._encoding = value
+        self._merged = None
 
     @property
     def raw(self) -> typing.List[typing.Tuple[bytes, bytes]]:
@@ -146,33 +181,17 @@ class Headers(typing.MutableMapping[str, str]):
         return [(raw_key, value) for raw_key, _, value in self._list]
 
     def keys(self) -> typing.KeysView[str]:
-        return {key.decode(self.encoding): None for _, key, _ in self._list}.keys()
+        return self._merged_items().keys()
 
     def values(self) -> typing.ValuesView[str]:
-        values_dict: typing.Dict[str, str] = {}
-        for _, key, value in self._list:
-            str_key = key.decode(self.encoding)
-            str_value = value.decode(self.encoding)
-            if str_key in values_dict:
-                values_dict[str_key] += f", {str_value}"
-            else:
-                values_dict[str_key] = str_value
-        return values_dict.values()
+        return self._merged_items().values()
 
     def items(self) -> typing.ItemsView[str, str]:
         """
         Return `(key, value)` items of headers. Concatenate headers
         into a single comma separated value when a key occurs multiple times.
         """
-        values_dict: typing.Dict[str, str] = {}
-        for _, key, value in self._list:
-            str_key = key.decode(self.encoding)
-            str_value = value.decode(self.encoding)
-            if str_key in values_dict:
-                values_dict[str_key] += f", {str_value}"
-            else:
-                values_dict[str_key] = str_value
-        return values_dict.items()
+        return self._merged_items().items()
 
     def multi_items(self) -> typing.List[typing.Tuple[str, str]]:
         """
@@ -185,6 +204,13 @@ class Headers(typing.MutableMapping[str, str]):
             for key, _, value in self._list
         ]
 
+    def to_curl_lines(self) -> typing.List[bytes]:
+        """
+        Return the header lines for curl's `HTTPHEADER`, built from the raw bytes,
+        without decoding them.
+        """
+        return [raw_key + b": " + value for raw_key, _, value in self._list]
+
     def get(self, key: str, default: typing.Any = None) -> typing.Any:
         """
         Return a header value. If multiple occurrences of the header occur
@@ -205,8 +231,7 @@ class Headers(typing.MutableMapping[str, str]):
 
         values = [
             item_value.decode(self.encoding)
-            for _, item_key, item_value in self._list
-            if item_key.lower() == get_header_key
+            for item_value in self._values_index().get(get_header_key, ())
         ]
 
         if not split_commas:
@@ -219,10 +244,12 @@ class Headers(typing.MutableMapping[str, str]):
 
     def update(self, headers: typing.Optional[HeaderTypes] = None) -> None:  # type: ignore
         headers = Headers(headers)
-        for key in headers.keys():
-            if key in self:
-                self.pop(key)
+        if not headers._list:
+            return
+        replaced = {key for _, key, _ in headers._list}
+        self._list = [item for item in self._list if item[1] not in replaced]
         self._list.extend(headers._list)
+        self._changed()
 
     def copy(self) -> "Headers":
         return Headers(self, encoding=self.encoding)
@@ -235,14 +262,9 @@ class Headers(typing.MutableMapping[str, str]):
         """
         normalized_key = key.lower().encode(self.encoding)
 
-        items = [
-            header_value.decode(self.encoding)
-            for _, header_key, header_value in self._list
-            if header_key == normalized_key
-        ]
-
-        if items:
-            return ", ".join(items)
+        values = self._values_index().get(normalized_key)
+        if values:
+            return ", ".join(value.decode(self.encoding) for value in values)
 
         raise KeyError(key)
 
@@ -269,6 +291,7 @@ class Headers(typing.MutableMapping[str, str]):
             self._list[idx] = (set_key, lookup_key, set_value)
         else:
             self._list.append((set_key, lookup_key, set_value))
+        self._changed()
 
     def __delitem__(self, key: str) -> None:
         """
@@ -287,10 +310,11 @@ class Headers(typing.MutableMapping[str, str]):
 
         for idx in reversed(pop_indexes):
             del self._list[idx]
+        self._changed()
 
     def __contains__(self, key: typing.Any) -> bool:
         header_key = key.lower().encode(self.encoding)
-        return header_key in [key for _, key, _ in self._list]
+        return header_key in self._values_index()
 
     def __iter__(self) -> typing.Iterator[typing.Any]:
         return iter(self.keys())
@@ -1,6 +1,6 @@
-import warnings
+import re
 from json import loads
-from typing import Optional
+from typing import Any, List, Optional, Union
 import queue
 
 from .. import Curl
@@ -16,11 +16,212 @@ def clear_queue(q: queue.Queue):
         q.unfinished_tasks = 0
 
 
+class _Rechunker:
+    """Coalesces and splits chunks into blocks of exactly `size` bytes, the last block
+    may be shorter. Bytes left over are kept in one buffer until the next chunk."""
+
+    __slots__ = ("size", "_buffer")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        size = self.size
+        buffer = self._buffer
+        view = memoryview(chunk)
+        start = 0
+        blocks = []
+        if buffer:
+            start = size - len(buffer)
+            buffer += view[:start]
+            if len(buffer) < size:
+                return blocks
+            blocks.append(bytes(buffer))
+            del buffer[:]
+        elif len(chunk) == size:
+            return [chunk]
+        end = len(chunk)
+        while end - start >= size:
+            blocks.append(bytes(view[start : start + size]))
+            start += size
+        if start < end:
+            buffer += view[start:]
+        return blocks
+
+    def flush(self) -> Optional[bytes]:
+        if not self._buffer:
+            return None
+        block = bytes(self._buffer)
+        del self._buffer[:]
+        return block
+
+
+_CHARSET = re.compile(r"charset=([\w-]+)")
+
+_NEWLINE = re.compile(rb"\r\n|\r|\n")
+
+
+class _LineSplitter:
+    """Splits a byte stream into lines incrementally, like `bytes.splitlines` or
+    `bytes.split(delimiter)` on the whole stream would.
+
+    Received data is appended to one buffer, and only the part not scanned yet is
+    searched for delimiters, so a long line costs linear time however it's chunked.
+    """
+
+    __slots__ = ("_delimiter", "_buffer", "_scanned")
+
+    def __init__(self, delimiter: Optional[bytes] = None):
+        self._delimiter = delimiter
+        self._buffer = bytearray()
+        self._scanned = 0  # no delimiter starts before this offset of the buffer
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        buffer = self._buffer
+        buffer += chunk
+        lines = []
+        start = 0
+        delimiter = self._delimiter
+        with memoryview(buffer) as view:
+            if delimiter:
+                pos = self._scanned
+                while True:
+                    idx = buffer.find(delimiter, pos)
+                    if idx == -1:
+                        break
+                    lines.append(view[start:idx].tobytes())
+                    start = pos = idx + len(delimiter)
+                # a delimiter may be split between two chunks
+                scanned = max(len(buffer) - len(delimiter) + 1, start)
+            else:
+                scanned = len(buffer)
+                for m in _NEWLINE.finditer(buffer, self._scanned):
+                    if m.end() == len(buffer) and buffer[-1] == 0x0D:
+                        # may be followed by a \n in the next chunk
+                        scanned = m.start()
+                        break
+                    lines.append(view[start : m.start()].tobytes())
+                    start = m.end()
+        if start:
+            del buffer[:start]
+        self._scanned = scanned - start
+        return lines
+
+    def flush(self) -> Optional[bytes]:
+        """The last line, if the stream does not end with a delimiter."""
+        buffer = self._buffer
+        if not buffer:
+            return None
+        if not self._delimiter and buffer[-1] == 0x0D:
+            del buffer[-1]
+        line = bytes(buffer)
+        del buffer[:]
+        self._scanned = 0
+        return line
+
+
+class ServerSentEvent:
+    """An event received from a `text/event-stream` response.
+
+    Attributes:
+        event: event type, `message` if not given.
+        data: event data, lines are joined with `\n`.
+        id: the last event ID seen in the stream, or None.
+        retry: reconnection time in milliseconds, if given with the event.
+    """
+
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(
+        self,
+        event: str = "message",
+        data: str = "",
+        id: Optional[str] = None,
+        retry: Optional[int] = None,
+    ):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    def json(self, **kw):
+        return loads(self.data, **kw)
+
+    def __repr__(self):
+        return f"ServerSentEvent(event={self.event!r}, data={self.data!r}, id={self.id!r})"
+
+
+class _EventParser:
+    """Parses a `text/event-stream` incrementally, following the HTML spec:
+    https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation
+
+    The last event ID and the reconnection time are kept across streams, so that one
+    parser can be used for all the reconnections.
+    """
+
+    def __init__(self):
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+        self._reset_stream()
+
+    def _reset_stream(self):
+        self._lines = _LineSplitter()
+        self._first_line = True
+        self._event = ""
+        self._data: List[str] = []
+        self._retry: Optional[int] = None
+
+    def new_stream(self):
+        """Drop what's left of the previous stream, an incomplete event is discarded."""
+        self._reset_stream()
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        events = []
+        for line in self._lines.feed(chunk):
+            if self._first_line:
+                self._first_line = False
+                if line.startswith(b"\xef\xbb\xbf"):
+                    line = line[3:]
+            if not line:
+                # dispatch
+                if self._data:
+                    events.append(
+                        ServerSentEvent(
+                            self._event or "message",
+                            "\n".join(self._data),
+                            self.last_event_id,
+                            self._retry,
+                        )
+                    )
+                self._event = ""
+                self._data = []
+                self._retry = None
+                continue
+            if line[0] == 0x3A:  # ":", a comment
+                continue
+            field, sep, value = line.partition(b":")
+            if sep and value[:1] == b" ":
+                value = value[1:]
+            if field == b"data":
+                self._data.append(value.decode("utf-8", errors="replace"))
+            elif field == b"event":
+                self._event = value.decode("utf-8", errors="replace")
+            elif field == b"id":
+                if b"\0" not in value:
+                    self.last_event_id = value.decode("utf-8", errors="replace")
+            elif field == b"retry":
+                if value.isdigit():
+                    self.retry = self._retry = int(value)
+        return events
+
+
 class Request:
     def __init__(self, url: str, headers: Headers, method: str):
         self.url = url
         self.headers = headers
         self.method = method
+        self._body: Any = None  # a streamed body, whose errors abort the transfer
 
 
 class Response:
@@ -43,27 +244,98 @@ class Response:
         history: history redirections, only headers are available.
     """
 
-    def __init__(self, curl: Optional[Curl] = None, request: Optional[Request] = None):
+    def __init__(
+        self,
+        curl: Optional[Curl] = None,
+        request: Optional[Request] = None,
+        raw_headers: bytes = b"",
+    ):
         self.curl = curl
         self.request = request
         self.url = ""
         self.content = b""
         self.status_code = 200
-        self.reason = "OK"
         self.ok = True
-        self.headers = Headers()
         self.cookies = Cookies()
         self.elapsed = 0.0
-        self.encoding = "utf-8"
-        self.charset = self.encoding
         self.redirect_count = 0
-        self.redirect_url = ""
         self.http_version = 0
         self.history = []
         self.infos = {}
         self.queue: Optional[queue.Queue] = None
         self.stream_task = None
         self.quit_now = None
+        # headers, reason, encoding and redirect_url are parsed on first access.
+        self._raw_headers = raw_headers
+        self._headers: Optional[Headers] = None
+        self._reason: Optional[str] = None
+        self._encoding: Optional[str] = None
+        self._redirect_url: Union[str, bytes] = ""
+
+    def _parse_headers(self):
+        header_list = []
+        reason = b"OK"
+        for header_line in self._raw_headers.splitlines():
+            if not header_line.strip():
+                continue
+            if header_line.startswith(b"HTTP/"):
+                # read header from last response
+                reason = Curl.get_reason_phrase(header_line)
+                # empty header list for new redirected response
+                header_list = []
+                continue
+            if header_line.startswith(b" ") or header_line.startswith(b"\t"):
+                header_list[-1] += header_line
+                continue
+            header_list.append(header_line)
+        if self._headers is None:
+            self._headers = Headers(header_list)
+        if self._reason is None:
+            self._reason = reason.decode()
+
+    @property
+    def headers(self) -> Headers:
+        if self._headers is None:
+            self._parse_headers()
+        return self._headers  # type: ignore
+
+    @headers.setter
+    def headers(self, value: Headers):
+        self._headers = value
+
+    @property
+    def reason(self) -> str:
+        if self._reason is None:
+            self._parse_headers()
+        return self._reason  # type: ignore
+
+    @reason.setter
+    def reason(self, value: str):
+        self._reason = value
+
+    @property
+    def encoding(self) -> str:
+        if self._encoding is None:
+            content_type = self.headers.get("Content-Type", default="")
+            m = _CHARSET.search(content_type)
+            self._encoding = m.group(1) if m else "utf-8"  # TODO use chardet
+        return self._encoding
+
+    @encoding.setter
+    def encoding(self, value: str):
+        self._encoding = value
+
+    charset = encoding
+
+    @property
+    def redirect_url(self) -> str:
+        if isinstance(self._redirect_url, bytes):
+            self._redirect_url = self._redirect_url.decode()
+        return self._redirect_url
+
+    @redirect_url.setter
+    def redirect_url(self, value: Union[str, bytes]):
+        self._redirect_url = value
 
     def _decode(self, content: bytes) -> str:
         try:
@@ -80,36 +352,41 @@ class Response:
             raise RequestsError(f"HTTP Error {self.status_code}: {self.reason}")
 
     def iter_lines(self, chunk_size=None, decode_unicode=False, delimiter=None):
-        """
-        Copied from: https://requests.readthedocs.io/en/latest/_modules/requests/models/
-        which is under the License: Apache 2.0
-        """
-        pending = None
+        """Iterate the body of a streamed response line by line.
 
+        Parameters:
+            chunk_size: passed to `iter_content`.
+            delimiter: bytes to split lines with, by default `\n`, `\r` and `\r\n`.
+        """
+        splitter = _LineSplitter(delimiter)
         for chunk in self.iter_content(
             chunk_size=chunk_size, decode_unicode=decode_unicode
         ):
-            if pending is not None:
-                chunk = pending + chunk
-            if delimiter:
-                lines = chunk.split(delimiter)
-            else:
-                lines = chunk.splitlines()
-            if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
-                pending = lines.pop()
-            else:
-                pending = None
+            yield from splitter.feed(chunk)
+        line = splitter.flush()
+        if line is not None:
+            yield line
 
-            yield from lines
+    def iter_events(self, chunk_size=None):
+        """Iterate the events of a `text/event-stream` response.
 
-        if pending is not None:
-            yield pending
+        Parameters:
+            chunk_size: passed to `iter_content`.
+        """
+        parser = _EventParser()
+        for chunk in self.iter_content(chunk_size=chunk_size):
+            yield from parser.feed(chunk)
 
     def iter_content(self, chunk_size=None, decode_unicode=False):
-        if chunk_size:
-            warnings.warn("chunk_size is ignored, there is no way to tell curl that.")
+        """Iterate the body of a streamed response.
+
+        Parameters:
+            chunk_size: yield blocks of this size, the last one may be shorter.
+                By default, chunks are yielded as received from curl.
+        """
         if decode_unicode:
             raise NotImplementedError()
+        rechunker = _Rechunker(chunk_size) if chunk_size else None
         while True:
             chunk = self.queue.get()  # type: ignore
 
@@ -121,9 +398,16 @@ class Response:
             # end of stream.
             if chunk is None:
                 self.curl.reset()  # type: ignore
+                if rechunker is not None:
+                    block = rechunker.flush()
+                    if block is not None:
+                        yield block
                 return
 
-            yield chunk
+            if rechunker is not None:
+                yield from rechunker.feed(chunk)
+            else:
+                yield chunk
 
     def json(self, **kw):
         return loads(self.content, **kw)
@@ -133,37 +417,29 @@ class Response:
         self.stream_task.result()  # type: ignore
 
     async def aiter_lines(self, chunk_size=None, decode_unicode=False, delimiter=None):
-        """
-        Copied from: https://requests.readthedocs.io/en/latest/_modules/requests/models/
-        which is under the License: Apache 2.0
-        """
-        pending = None
-
+        """Iterate the body of a streamed response line by line, see `iter_lines`."""
+        splitter = _LineSplitter(delimiter)
         async for chunk in self.aiter_content(
             chunk_size=chunk_size, decode_unicode=decode_unicode
         ):
-            if pending is not None:
-                chunk = pending + chunk
-            if delimiter:
-                lines = chunk.split(delimiter)
-            else:
-                lines = chunk.splitlines()
-            if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
-                pending = lines.pop()
-            else:
-                pending = None
-
-            for line in lines:
+            for line in splitter.feed(chunk):
                 yield line
+        line = splitter.flush()
+        if line is not None:
+            yield line
 
-        if pending is not None:
-            yield pending
+    async def aiter_events(self, chunk_size=None):
+        """Iterate the events of a `text/event-stream` response, see `iter_events`."""
+        parser = _EventParser()
+        async for chunk in self.aiter_content(chunk_size=chunk_size):
+            for event in parser.feed(chunk):
+                yield event
 
     async def aiter_content(self, chunk_size=None, decode_unicode=False):
-        if chunk_size:
-            warnings.warn("chunk_size is ignored, there is no way to tell curl that.")
+        """Iterate the body of a streamed response, see `iter_content`."""
         if decode_unicode:
             raise NotImplementedError()
+        rechunker = _Rechunker(chunk_size) if chunk_size else None
 
         while True:
             chunk = await self.queue.get()  # type: ignore
@@ -176,9 +452,17 @@ class Response:
             # end of stream.
             if chunk is None:
                 await self.aclose()
+                if rechunker is not None:
+                    block = rechunker.flush()
+                    if block is not None:
+                        yield block
                 return
 
-            yield chunk
+            if rechunker is not None:
+                for block in rechunker.feed(chunk):
+                    yield block
+            else:
+                yield chunk
 
     async def atext(self) -> str:
         return self._decode(await self.acontent())
@@ -190,4 +474,9 @@ class Response:
         return b"".join(chunks)
 
     async def aclose(self):
+        if self.quit_now is not None:
+            # abort the transfer if it's still going, a paused one has to be resumed
+            # to find out.
+            self.quit_now.set()
+            self.queue.resume()  # type: ignore
         await self.stream_task  # type: ignore
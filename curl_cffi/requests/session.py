@@ -1,24 +1,64 @@
 import asyncio
+import os
 from contextlib import contextmanager, asynccontextmanager
 import re
+import stat
+import tempfile
 import threading
+import time
 import warnings
 import queue
+from collections import deque
 from enum import Enum
-from functools import partialmethod
+from functools import partial, partialmethod
 from io import BytesIO
 from json import dumps
-from typing import Callable, Dict, List, Any, Optional, Tuple, Union, cast
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 from urllib.parse import ParseResult, parse_qsl, unquote, urlencode, urlparse
 from concurrent.futures import ThreadPoolExecutor
 
 
-from .. import AsyncCurl, Curl, CurlError, CurlInfo, CurlOpt, CurlHttpVersion
-from ..curl import CURL_WRITEFUNC_ERROR
-from .cookies import Cookies, CookieTypes, CurlMorsel
+from .. import (
+    AsyncCurl,
+    Curl,
+    CurlError,
+    CurlInfo,
+    CurlMOpt,
+    CurlOpt,
+    CurlHttpVersion,
+    CurlMulti,
+    CurlShare,
+)
+from ..const import CurlECode
+from ..curl import (
+    CURL_WRITEFUNC_ERROR,
+    CURL_WRITEFUNC_PAUSE,
+    CURL_READFUNC_ABORT,
+    CURL_READFUNC_PAUSE,
+    CURLPAUSE_CONT,
+    ContentBuffer,
+    CurlMime,
+    FdWriter,
+)
+from .cookies import Cookies, CookieTypes, CurlMorsel, IndexedCookieJar
 from .errors import RequestsError
 from .headers import Headers, HeaderTypes
-from .models import Request, Response
+from .models import Request, Response, ServerSentEvent, _EventParser
 
 try:
     import gevent
@@ -97,21 +137,23 @@ def _update_url_params(url: str, params: Dict) -> str:
     return new_url
 
 
-def _update_header_line(header_lines: List[str], key: str, value: str):
+def _update_header_line(header_lines: List[bytes], key: bytes, value: bytes):
     """Update header line list by key value pair."""
+    prefix = key.lower() + b":"
     for idx, line in enumerate(header_lines):
-        if line.lower().startswith(key.lower() + ":"):
-            header_lines[idx] = f"{key}: {value}"
+        if line.lower().startswith(prefix):
+            header_lines[idx] = key + b": " + value
             break
     else:  # if not break
-        header_lines.append(f"{key}: {value}")
+        header_lines.append(key + b": " + value)
 
 
-def _peek_queue(q: queue.Queue, default=None):
-    try:
-        return q.queue[0]
-    except IndexError:
-        return default
+def _request_error(e: CurlError, rsp: Response) -> RequestsError:
+    """The error of a failed transfer, caused by the exception of the streamed body of
+    the request if that's what aborted it."""
+    error = RequestsError(str(e), e.code, rsp)
+    error.__cause__ = getattr(rsp.request._body, "error", None) or e  # type: ignore
+    return error
 
 
 def _peek_aio_queue(q: asyncio.Queue, default=None):
@@ -123,6 +165,449 @@ def _peek_aio_queue(q: asyncio.Queue, default=None):
 
 not_set = object()
 
+# errors of a lost connection, after which an event stream is reconnected
+_EVENTS_RETRIED_ERRORS = frozenset(
+    [
+        CurlECode.COULDNT_CONNECT,
+        CurlECode.HTTP2,
+        CurlECode.PARTIAL_FILE,
+        CurlECode.OPERATION_TIMEDOUT,
+        CurlECode.GOT_NOTHING,
+        CurlECode.SEND_ERROR,
+        CurlECode.RECV_ERROR,
+        CurlECode.HTTP2_STREAM,
+    ]
+)
+
+# names of the cookies set by a response
+_SET_COOKIE = re.compile(rb"^set-cookie:[ \t]*([^=;\s]+)", re.I | re.M)
+
+# from this many cookies on, they are loaded into curl from a file at once.
+_BULK_COOKIES = 256
+
+
+def _push_cookies(curl: Curl, morsels: List[CurlMorsel], bulk: bool = False):
+    """Add cookies to the cookie engine of curl, with a COOKIELIST command each, or
+    for many cookies, written to a cookie file which curl reloads in one command.
+
+    The file is private to the user (mode 0600), and removed right after, even when
+    curl fails to load it."""
+    if not bulk or len(morsels) < _BULK_COOKIES:
+        for morsel in morsels:
+            curl.setopt(CurlOpt.COOKIELIST, morsel.to_curl_format())
+        return
+    fd, path = tempfile.mkstemp(suffix=".cookies")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("".join(morsel.to_curl_format() + "\n" for morsel in morsels))
+        curl.setopt(CurlOpt.COOKIEFILE, path.encode())
+        curl.setopt(CurlOpt.COOKIELIST, "RELOAD")  # read the cookie files now
+    finally:
+        os.unlink(path)
+
+
+class _SyncStreamQueue:
+    """Chunks of a streamed response in the sync `Session`, received on the consumer's thread.
+
+    `get` performs the transfer with a multi handle of its own, only until a chunk is
+    available. Once more than `max_buffered_bytes` are waiting, the write callback pauses
+    the transfer, so no more data is received than consumed. It's also the `stream_task`
+    of the response, `result` aborts the transfer.
+    """
+
+    def __init__(
+        self,
+        max_buffered_bytes: int = 0,
+        call_blocking: Optional[Callable[[Callable[[], Any]], Any]] = None,
+    ):
+        self._chunks: Deque[Any] = deque()
+        self._call_blocking = call_blocking
+        self._curl: Optional[Curl] = None
+        self._multi: Optional[CurlMulti] = None
+        self._make_error: Optional[Callable[[CurlError], RequestsError]] = None
+        self._on_finish: Optional[Callable[[], None]] = None
+        self._max_buffered_bytes = max_buffered_bytes
+        self._buffered = 0
+        self._paused = False
+        self._done = False
+
+    def start(
+        self,
+        curl: Curl,
+        make_error: Callable[[CurlError], RequestsError],
+        on_finish: Optional[Callable[[], None]] = None,
+    ):
+        self._curl = curl
+        self._make_error = make_error
+        self._on_finish = on_finish
+        self._multi = CurlMulti()
+        self._multi.add_handle(curl)
+
+    def put_nowait(self, chunk):
+        if self._chunks and self._buffered + len(chunk) > self._max_buffered_bytes:
+            self._paused = True
+            raise queue.Full
+        self._buffered += len(chunk)
+        self._chunks.append(chunk)
+
+    def peek(self):
+        """Drive the transfer until an item is available, without taking it."""
+        while not self._chunks:
+            if self._done:
+                return None
+            self._step()
+        return self._chunks[0]
+
+    def get(self):
+        item = self.peek()
+        if self._chunks:
+            self._chunks.popleft()
+            if isinstance(item, bytes):
+                self._buffered -= len(item)
+        return item
+
+    def _step(self):
+        if self._paused:
+            self._paused = False
+            self._curl.pause(CURLPAUSE_CONT)  # type: ignore
+            if self._chunks:
+                return
+        running = self._multi.perform()  # type: ignore
+        done = self._multi.info_read()  # type: ignore
+        if done:
+            _, error = done[0]
+            if error is not None:
+                # the response is parsed before the handle is closed
+                self._chunks.append(self._make_error(error))  # type: ignore
+            self._finish()
+            # None acts as a sentinel
+            self._chunks.append(None)
+        elif running and not self._chunks:
+            if self._call_blocking is not None:
+                self._call_blocking(self._multi.poll)  # type: ignore
+            else:
+                self._multi.poll()  # type: ignore
+
+    def _finish(self):
+        self._done = True
+        self._curl.clean_after_perform()  # type: ignore
+        self._multi.close()  # type: ignore
+        if self._on_finish is not None:
+            self._on_finish()
+
+    def result(self):
+        """Abort the transfer if it's not finished yet."""
+        if not self._done:
+            self._finish()
+        self._chunks.clear()
+        self._buffered = 0
+
+
+class _AsyncStreamQueue(asyncio.Queue):
+    """Chunks of a streamed response in `AsyncSession`, bounded by bytes.
+
+    Once more than `max_buffered_bytes` are waiting, the write callback pauses the
+    transfer, it's resumed when the consumer has taken half of them.
+    """
+
+    def __init__(self, curl: Curl, max_buffered_bytes: Optional[int] = None):
+        super().__init__()
+        self._curl = curl
+        self._max_buffered_bytes = max_buffered_bytes
+        self._buffered = 0
+        self._paused = False
+
+    def put_nowait(self, item):
+        if isinstance(item, bytes):
+            if (
+                self._max_buffered_bytes is not None
+                and self._buffered
+                and self._buffered + len(item) > self._max_buffered_bytes
+            ):
+                self._paused = True
+                raise asyncio.QueueFull
+            self._buffered += len(item)
+        super().put_nowait(item)
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        if isinstance(item, bytes):
+            self._buffered -= len(item)
+            if self._paused and self._buffered <= self._max_buffered_bytes // 2:  # type: ignore
+                self.resume()
+        return item
+
+    def resume(self):
+        """Resume a paused transfer, the data held back by curl is put right away."""
+        if self._paused:
+            self._paused = False
+            self._curl.pause(CURLPAUSE_CONT)
+
+
+def _remaining_size(f) -> int:
+    """Bytes left in a regular file from the current position, -1 if unknown."""
+    if isinstance(f, BytesIO):
+        return len(f.getbuffer()) - f.tell()
+    try:
+        st = os.fstat(f.fileno())
+        # pipes, sockets and devices report no size, stream them chunked.
+        if not stat.S_ISREG(st.st_mode):
+            return -1
+        return st.st_size - f.tell()
+    except (AttributeError, OSError, ValueError):
+        return -1
+
+
+def _is_form_pairs(data: Any) -> bool:
+    """Whether data is a list of (key, value) form fields, as accepted by requests."""
+    return (
+        isinstance(data, (list, tuple))
+        and bool(data)
+        and all(isinstance(item, tuple) for item in data)
+    )
+
+
+def _add_file_part(mime: CurlMime, name: str, value: Any):
+    """Add a part of `files`, value is a file object, a path, the content in bytes, or
+    a tuple of (filename, file object or content[, content_type[, headers]])."""
+    filename = None
+    content_type = None
+    headers = None
+    if isinstance(value, tuple):
+        filename, value, *rest = value
+        if rest:
+            content_type = rest[0]
+        if len(rest) > 1 and rest[1]:
+            headers = [f"{k}: {v}" for k, v in rest[1].items()]
+
+    if isinstance(value, os.PathLike):
+        local_path = os.fspath(value)
+        if filename is None:
+            filename = os.path.basename(local_path)
+        mime.addpart(
+            name,
+            content_type=content_type,
+            filename=filename,
+            local_path=local_path,
+            headers=headers,
+        )
+        return
+
+    if filename is None:
+        path = getattr(value, "name", None)
+        if isinstance(path, str) and path[:1] != "<":
+            filename = os.path.basename(path)
+    if hasattr(value, "readinto"):
+        path = getattr(value, "name", None)
+        if isinstance(path, str) and os.path.isfile(path) and value.tell() == 0:
+            # a file on disk, let libcurl read it on its own.
+            mime.addpart(
+                name,
+                content_type=content_type,
+                filename=filename,
+                local_path=path,
+                headers=headers,
+            )
+        else:
+            mime.addpart(
+                name,
+                content_type=content_type,
+                filename=filename,
+                data=value,
+                size=_remaining_size(value),
+                headers=headers,
+            )
+    else:
+        if hasattr(value, "read"):
+            value = value.read()
+        mime.addpart(
+            name,
+            content_type=content_type,
+            filename=filename,
+            data=value,
+            headers=headers,
+        )
+
+
+def _build_mime(curl: Curl, data: Any, files: Any) -> CurlMime:
+    """A multipart form of the `data` fields, if a dict or pairs, followed by the `files`."""
+    if not (isinstance(data, dict) or _is_form_pairs(data) or data in (None, [], ())):
+        # requests refuses a raw body too, it can't be a part of the form.
+        raise ValueError("data must be a dict or a list of pairs when files are given")
+    mime = CurlMime(curl)
+    if data:
+        for k, v in data.items() if isinstance(data, dict) else data:
+            mime.addpart(k, data=v if isinstance(v, bytes) else str(v))
+    for name, value in files.items() if isinstance(files, dict) else files:
+        _add_file_part(mime, name, value)
+    return mime
+
+
+class _IterBody:
+    """Feeds the chunks of an iterable of bytes to the read callback of curl."""
+
+    def __init__(self, iterable: Iterable):
+        self._it = iter(iterable)
+        self._pending = memoryview(b"")
+        self.error: Optional[BaseException] = None
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                chunk = next(self._it, None)
+                if chunk is None:
+                    return 0
+                self._pending = memoryview(
+                    chunk.encode() if isinstance(chunk, str) else chunk
+                )
+            except Exception as e:
+                # raised again by the request, instead of a bare "aborted by callback"
+                self.error = e
+                return CURL_READFUNC_ABORT
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+class _AsyncIterBody(_IterBody):
+    """Feeds the chunks of an async iterable of bytes to the read callback of curl.
+
+    The callback can't wait, so when no chunk is ready, the upload is paused until the
+    next one has been fetched by a task on the event loop.
+    """
+
+    def __init__(self, curl: Curl, iterable: AsyncIterable):
+        self._curl = curl
+        self._ait = iterable.__aiter__()
+        self._pending = memoryview(b"")
+        self._fetching: Optional[asyncio.Future] = None
+        self._done = False
+        self.error: Optional[BaseException] = None
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            if self.error is not None:
+                return CURL_READFUNC_ABORT
+            if self._done:
+                return 0
+            if self._fetching is None:
+                self._fetching = asyncio.ensure_future(self._fetch())
+            return CURL_READFUNC_PAUSE
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    async def _fetch(self):
+        try:
+            chunk = b""
+            while not chunk:
+                chunk = await self._ait.__anext__()
+            self._pending = memoryview(chunk.encode() if isinstance(chunk, str) else chunk)
+        except StopAsyncIteration:
+            self._done = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self._fetching = None
+        try:
+            self._curl.pause(CURLPAUSE_CONT)
+        except CurlError:
+            pass  # the transfer is already over
+
+
+class _Download:
+    """A body written straight to a file by libcurl, see `Session.download`."""
+
+    def __init__(self, path_or_fd: Union[str, os.PathLike, int], resume: bool, preallocate: bool):
+        if isinstance(path_or_fd, int):
+            self.fd = path_or_fd
+            self._owned = False
+        else:
+            flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+            if not resume:
+                flags |= os.O_TRUNC
+            self.fd = os.open(path_or_fd, flags, 0o666)
+            self._owned = True
+        # where the body is written, after what's already in the file when resuming
+        self.start = os.lseek(self.fd, 0, os.SEEK_END if resume else os.SEEK_CUR)
+        # offset of the resource requested with a range
+        self.resume_from = self.start if resume else 0
+        self.writer = FdWriter(self.fd)
+        self.header_buffer = BytesIO()
+        self._preallocate = preallocate and hasattr(os, "posix_fallocate")
+        self._preallocated = False
+        self._curl: Optional[Curl] = None
+
+    def options(self, curl: Curl) -> Dict[CurlOpt, Any]:
+        self._curl = curl
+        opts: Dict[CurlOpt, Any] = {
+            CurlOpt.WRITEDATA: self.writer,
+            CurlOpt.HEADERFUNCTION: self.header_callback,
+        }
+        if self.resume_from:
+            opts[CurlOpt.RESUME_FROM_LARGE] = self.resume_from
+        return opts
+
+    def header_callback(self, line: bytes) -> int:
+        self.header_buffer.write(line)
+        if line.strip():
+            return len(line)
+        # end of the headers of a response, 1xx and redirects included.
+        code = self._curl.getinfo(CurlInfo.RESPONSE_CODE)  # type: ignore
+        # only the body of a successful response goes to the file.
+        self.writer.discard = not 200 <= code < 300  # type: ignore
+        if code == 200 and self.resume_from:
+            # the range was ignored, start over
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            os.ftruncate(self.fd, 0)
+            self.start = self.resume_from = 0
+        if self._preallocate and not self.writer.discard:
+            size = self._curl.getinfo(CurlInfo.CONTENT_LENGTH_DOWNLOAD_T)  # type: ignore
+            if size > 0:  # type: ignore
+                try:
+                    os.posix_fallocate(self.fd, self.start, size)  # type: ignore
+                    self._preallocated = True
+                except OSError:
+                    pass  # not supported by the file system, not worth failing for.
+        return len(line)
+
+    def write_error(self) -> Optional[OSError]:
+        """The error of the last failed write to the file, if any."""
+        try:
+            self.writer.check_error()
+        except OSError as e:
+            return e
+        return None
+
+    def finish(self, check: bool = True):
+        """Drop the unused preallocated space, and close the file if opened here.
+
+        Parameters:
+            check: raise the errors of the file, only when the transfer succeeded, so
+                they don't hide the error of a failed one.
+        """
+        try:
+            try:
+                if self._preallocated:
+                    os.ftruncate(self.fd, self.start + self.writer.written)
+            finally:
+                if self._owned:
+                    os.close(self.fd)
+        except OSError:
+            if check:
+                raise
+        if check:
+            self.writer.check_error()
+
+    @staticmethod
+    def check_kwargs(kwargs: Dict[str, Any]):
+        """Reject the request parameters which make no sense when writing to a file."""
+        for name in ("stream", "accept_encoding", "content_callback"):
+            if name in kwargs:
+                raise TypeError(f"download() got an unsupported argument {name!r}")
+
 
 class BaseSession:
     """Provide common methods for setting curl options and reading info in sessions."""
@@ -147,6 +632,9 @@ class BaseSession:
         http_version: Optional[CurlHttpVersion] = None,
         debug: bool = False,
         interface: Optional[str] = None,
+        max_buffered_bytes: Optional[int] = None,
+        share_connections: bool = False,
+        bulk_cookies: bool = False,
     ):
         self.headers = Headers(headers)
         self.cookies = Cookies(cookies)
@@ -165,6 +653,17 @@ class BaseSession:
         self.http_version = http_version
         self.debug = debug
         self.interface = interface
+        self.max_buffered_bytes = max_buffered_bytes
+        self.bulk_cookies = bulk_cookies
+        # DNS and TLS sessions are shared among all the handles we create, connections
+        # only on request, libcurl doesn't support sharing them between threads.
+        self._share = CurlShare(connections=share_connections)
+
+    def _create_curl(self) -> Curl:
+        """Create a fresh curl handle attached to the session's share object."""
+        curl = Curl(debug=self.debug)
+        curl.setopt(CurlOpt.SHARE, self._share)
+        return curl
 
     def _set_curl_options(
         self,
@@ -172,7 +671,9 @@ class BaseSession:
         method: str,
         url: str,
         params: Optional[dict] = None,
-        data: Optional[Union[Dict[str, str], str, BytesIO, bytes]] = None,
+        data: Optional[
+            Union[Dict[str, str], str, BytesIO, bytes, Iterable, AsyncIterable]
+        ] = None,
         json: Optional[dict] = None,
         headers: Optional[HeaderTypes] = None,
         cookies: Optional[CookieTypes] = None,
@@ -194,24 +695,34 @@ class BaseSession:
         max_recv_speed: int = 0,
         queue_class: Any = None,
         event_class: Any = None,
+        template: Optional["RequestTemplate"] = None,
     ):
         c = curl
+        # options are collected and set in batches, see `Curl.setopts`.
+        opts: Dict[CurlOpt, Any] = {}
 
         # method
         if method == "POST":
-            c.setopt(CurlOpt.POST, 1)
+            opts[CurlOpt.POST] = 1
         elif method != "GET":
-            c.setopt(CurlOpt.CUSTOMREQUEST, method.encode())
+            opts[CurlOpt.CUSTOMREQUEST] = method.encode()
 
         # url
         if self.params:
             url = _update_url_params(url, self.params)
         if params:
             url = _update_url_params(url, params)
-        c.setopt(CurlOpt.URL, url.encode())
+        opts[CurlOpt.URL] = url.encode()
 
         # data/body/json
-        if isinstance(data, dict):
+        upload = None
+        mime = None
+        if files:
+            # multipart/form-data, the parts are read by libcurl, see `CurlMime`.
+            mime = _build_mime(c, data, files)
+            body = b""
+            json = None  # ignored, as in requests
+        elif isinstance(data, dict) or _is_form_pairs(data):
             body = urlencode(data).encode()
         elif isinstance(data, str):
             body = data.encode()
@@ -222,21 +733,39 @@ class BaseSession:
         elif data is None:
             body = b""
         else:
-            raise TypeError("data must be dict, str, BytesIO or bytes")
+            upload = self._body_reader(c, data)
+            if upload is None:
+                raise TypeError(
+                    "data must be dict, str, bytes, a file object or an iterable of bytes"
+                )
+            body = b""
         if json is not None:
             body = dumps(json, separators=(",", ":")).encode()
-
+            upload = None
+
+        if mime is not None:
+            opts[CurlOpt.MIMEPOST] = mime
+        elif upload is not None:
+            # streamed in chunks by the read callback, chunked encoding if the size is unknown.
+            reader, size = upload
+            if method != "PUT":
+                opts.pop(CurlOpt.POST, None)
+                opts[CurlOpt.CUSTOMREQUEST] = method.encode()
+            opts[CurlOpt.UPLOAD] = 1
+            opts[CurlOpt.INFILESIZE_LARGE] = size
+            opts[CurlOpt.READDATA] = reader
         # Tell libcurl to be aware of bodies and related headers when,
         # 1. POST/PUT/PATCH, even if the body is empty, it's up to curl to decide what to do;
         # 2. GET/DELETE with body, although it's against the RFC, some applications. e.g. Elasticsearch, use this.
-        if body or method in ("POST", "PUT", "PATCH"):
-            c.setopt(CurlOpt.POSTFIELDS, body)
+        elif body or method in ("POST", "PUT", "PATCH"):
+            opts[CurlOpt.POSTFIELDS] = body
             # necessary if body contains '\0'
-            c.setopt(CurlOpt.POSTFIELDSIZE, len(body))
+            opts[CurlOpt.POSTFIELDSIZE] = len(body)
 
         # headers
-        h = Headers(self.headers)
-        h.update(headers)
+        h = Headers(self.headers if template is None else template.headers)
+        if headers:
+            h.update(headers)
 
         # remove Host header if it's unnecessary, otherwise curl maybe confused.
         # Host header will be automatically add by curl if it's not present.
@@ -250,115 +779,242 @@ class BaseSession:
                 except KeyError:
                     pass
 
-        header_lines = []
-        for k, v in h.multi_items():
-            header_lines.append(f"{k}: {v}")
+        form_content_type = (
+            (isinstance(data, dict) or _is_form_pairs(data))
+            and method != "POST"
+            and not files
+        )
+        # Set even on handles duplicated from a template: curl_easy_duphandle doesn't
+        # copy the header list, the duplicate would point to the one of the template.
+        header_lines = h.to_curl_lines()
         if json is not None:
-            _update_header_line(header_lines, "Content-Type", "application/json")
-        if isinstance(data, dict) and method != "POST":
+            _update_header_line(header_lines, b"Content-Type", b"application/json")
+        if form_content_type:
             _update_header_line(
-                header_lines, "Content-Type", "application/x-www-form-urlencoded"
+                header_lines, b"Content-Type", b"application/x-www-form-urlencoded"
             )
-        # print("header lines", header_lines)
-        c.setopt(CurlOpt.HTTPHEADER, [h.encode() for h in header_lines])
+        opts[CurlOpt.HTTPHEADER] = header_lines
 
         req = Request(url, h, method)
+        if upload is not None:
+            req._body = upload[0]
+
+        if template is None:
+            self._set_static_options(
+                opts,
+                auth=auth,
+                timeout=timeout,
+                allow_redirects=allow_redirects,
+                max_redirects=max_redirects,
+                verify=verify,
+                referer=referer,
+                accept_encoding=accept_encoding,
+                stream=stream,
+            )
+        elif stream:
+            # templates are prepared for normal requests, see `_set_static_options`.
+            opts[CurlOpt.TIMEOUT_MS] = 0
+            opts.update(self._timeout_options(template.timeout, stream=True))
 
-        # cookies
-        c.setopt(CurlOpt.COOKIEFILE, b"")  # always enable the curl cookie engine first
-        c.setopt(CurlOpt.COOKIELIST, "ALL")  # remove all the old cookies first.
-
-        for morsel in self.cookies.get_cookies_for_curl(req):
-            # print("Setting", morsel.to_curl_format())
-            curl.setopt(CurlOpt.COOKIELIST, morsel.to_curl_format())
+        # proxies
+        if template is not None:
+            proxies = template.proxies
+        elif self.proxies:
+            proxies = {**self.proxies, **(proxies or {})}
+        if proxies:
+            if url.startswith("http://"):
+                if proxies["http"] is not None:
+                    opts[CurlOpt.PROXY] = proxies["http"]
+            elif url.startswith("https://"):
+                if proxies["https"] is not None:
+                    if proxies["https"].startswith("https://"):
+                        raise RequestsError(
+                            "You are using http proxy WRONG, the prefix should be 'http://' not 'https://',"
+                            "see: https://github.com/yifeikong/curl_cffi/issues/6"
+                        )
+                    opts[CurlOpt.PROXY] = proxies["https"]
+                    # for http proxy, need to tell curl to enable tunneling
+                    if not proxies["https"].startswith("socks"):
+                        opts[CurlOpt.HTTPPROXYTUNNEL] = 1
+
+        c.setopts(opts)
+        opts = {}
+
+        # cookies, only the changes since the last request are pushed to a handle.
+        jar = self.cookies.jar
+        morsels = None
+        state = c._cookie_state
+        if state is not None and state[0] is jar:
+            morsels, generation = self.cookies.get_changes_for_curl(req, state[1])
+            loaded_hosts = state[2]
+        if morsels is None:
+            generation = getattr(jar, "generation", None)
+            c.setopt(CurlOpt.COOKIEFILE, b"")  # always enable the curl cookie engine first
+            c.setopt(CurlOpt.COOKIELIST, "ALL")  # remove all the old cookies first.
+            morsels = []
+            loaded_hosts = set()
+        # an indexed jar is loaded host by host, other jars all at once.
+        host = urlparse(url).hostname if isinstance(jar, IndexedCookieJar) else None
+        if host not in loaded_hosts:
+            morsels.extend(self.cookies.get_cookies_for_curl(req))
+            loaded_hosts.add(host)
+        _push_cookies(c, morsels, self.bulk_cookies)
+        if generation is not None:
+            c._cookie_state = (jar, generation, loaded_hosts)
+        else:
+            c._cookie_state = None
         if cookies:
             temp_cookies = Cookies(cookies)
-            for morsel in temp_cookies.get_cookies_for_curl(req):
-                curl.setopt(CurlOpt.COOKIELIST, morsel.to_curl_format())
+            _push_cookies(c, temp_cookies.get_cookies_for_curl(req), self.bulk_cookies)
+            # not in the session, load all the cookies again next time.
+            c._cookie_state = None
+
+        if template is None:
+            self._set_impersonate_options(
+                c,
+                opts,
+                impersonate=impersonate,
+                default_headers=default_headers,
+                http_version=http_version,
+                interface=interface,
+                max_recv_speed=max_recv_speed,
+            )
 
-        # files
-        if files:
-            raise NotImplementedError("Files has not been implemented.")
+        buffer = None
+        q = None
+        header_recved = None
+        quit_now = None
+        if stream:
+            q = queue_class()  # type: ignore
+            header_recved = event_class()
+            quit_now = event_class()
 
-        # auth
-        if self.auth or auth:
-            if self.auth:
-                username, password = self.auth
-            if auth:
-                username, password = auth
-            c.setopt(CurlOpt.USERNAME, username.encode())  # type: ignore
-            c.setopt(CurlOpt.PASSWORD, password.encode())  # type: ignore
+            def qput(chunk):
+                if not header_recved.is_set():
+                    header_recved.set()
+                if quit_now.is_set():
+                    return CURL_WRITEFUNC_ERROR
+                try:
+                    q.put_nowait(chunk)
+                except (queue.Full, asyncio.QueueFull):
+                    # curl keeps the chunk, and hands it over again once unpaused.
+                    return CURL_WRITEFUNC_PAUSE
+                return len(chunk)
 
-        # timeout
+            opts[CurlOpt.WRITEFUNCTION] = qput
+        elif content_callback is not None:
+            opts[CurlOpt.WRITEFUNCTION] = content_callback
+        else:
+            buffer = ContentBuffer(c)
+            opts[CurlOpt.WRITEDATA] = buffer
+        header_buffer = BytesIO()
+        opts[CurlOpt.HEADERDATA] = header_buffer
+
+        if method == "HEAD":
+            opts[CurlOpt.NOBODY] = 1
+
+        c.setopts(opts)
+
+        return req, buffer, header_buffer, q, header_recved, quit_now
+
+    def _timeout_options(self, timeout, stream: bool) -> Dict[CurlOpt, int]:
         if timeout is not_set:
             timeout = self.timeout
         if timeout is None:
             timeout = 0  # indefinitely
 
+        opts = {}
         if isinstance(timeout, tuple):
             connect_timeout, read_timeout = timeout
             all_timeout = connect_timeout + read_timeout
-            c.setopt(CurlOpt.CONNECTTIMEOUT_MS, int(connect_timeout * 1000))
+            opts[CurlOpt.CONNECTTIMEOUT_MS] = int(connect_timeout * 1000)
             if not stream:
-                c.setopt(CurlOpt.TIMEOUT_MS, int(all_timeout * 1000))
+                opts[CurlOpt.TIMEOUT_MS] = int(all_timeout * 1000)
         else:
             if not stream:
-                c.setopt(CurlOpt.TIMEOUT_MS, int(timeout * 1000))  # type: ignore
+                opts[CurlOpt.TIMEOUT_MS] = int(timeout * 1000)  # type: ignore
             else:
-                c.setopt(CurlOpt.CONNECTTIMEOUT_MS, int(timeout * 1000))  # type: ignore
+                opts[CurlOpt.CONNECTTIMEOUT_MS] = int(timeout * 1000)  # type: ignore
+        return opts
+
+    def _body_reader(self, curl: Curl, data: Any) -> Optional[Tuple[Any, int]]:
+        """Returns the reader and size (-1 if unknown) of a body to stream, or None
+        if data is not streamable."""
+        if hasattr(data, "readinto"):
+            return data, _remaining_size(data)
+        if isinstance(data, Iterable):
+            return _IterBody(data), -1
+        return None
+
+    def _set_static_options(
+        self,
+        opts: Dict[CurlOpt, Any],
+        *,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: Optional[Union[float, Tuple[float, float], object]] = not_set,
+        allow_redirects: Optional[bool] = None,
+        max_redirects: Optional[int] = None,
+        verify: Optional[Union[bool, str]] = None,
+        referer: Optional[str] = None,
+        accept_encoding: Optional[str] = "gzip, deflate, br",
+        stream: bool = False,
+    ):
+        """Collect options which do not depend on the url or the body of a request."""
+        # auth
+        if self.auth or auth:
+            if self.auth:
+                username, password = self.auth
+            if auth:
+                username, password = auth
+            opts[CurlOpt.USERNAME] = username.encode()  # type: ignore
+            opts[CurlOpt.PASSWORD] = password.encode()  # type: ignore
+
+        # timeout
+        opts.update(self._timeout_options(timeout, stream))
 
         # allow_redirects
-        c.setopt(
-            CurlOpt.FOLLOWLOCATION,
-            int(self.allow_redirects if allow_redirects is None else allow_redirects),
+        opts[CurlOpt.FOLLOWLOCATION] = int(
+            self.allow_redirects if allow_redirects is None else allow_redirects
         )
 
         # max_redirects
-        c.setopt(
-            CurlOpt.MAXREDIRS,
-            self.max_redirects if max_redirects is None else max_redirects,
+        opts[CurlOpt.MAXREDIRS] = (
+            self.max_redirects if max_redirects is None else max_redirects
         )
 
-        # proxies
-        if self.proxies:
-            proxies = {**self.proxies, **(proxies or {})}
-        if proxies:
-            if url.startswith("http://"):
-                if proxies["http"] is not None:
-                    c.setopt(CurlOpt.PROXY, proxies["http"])
-            elif url.startswith("https://"):
-                if proxies["https"] is not None:
-                    if proxies["https"].startswith("https://"):
-                        raise RequestsError(
-                            "You are using http proxy WRONG, the prefix should be 'http://' not 'https://',"
-                            "see: https://github.com/yifeikong/curl_cffi/issues/6"
-                        )
-                    c.setopt(CurlOpt.PROXY, proxies["https"])
-                    # for http proxy, need to tell curl to enable tunneling
-                    if not proxies["https"].startswith("socks"):
-                        c.setopt(CurlOpt.HTTPPROXYTUNNEL, 1)
-
         # verify
         if verify is False or not self.verify and verify is None:
-            c.setopt(CurlOpt.SSL_VERIFYPEER, 0)
-            c.setopt(CurlOpt.SSL_VERIFYHOST, 0)
+            opts[CurlOpt.SSL_VERIFYPEER] = 0
+            opts[CurlOpt.SSL_VERIFYHOST] = 0
 
         # cert for this single request
         if isinstance(verify, str):
-            c.setopt(CurlOpt.CAINFO, verify)
+            opts[CurlOpt.CAINFO] = verify
 
         # cert for the session
         if verify in (None, True) and isinstance(self.verify, str):
-            c.setopt(CurlOpt.CAINFO, self.verify)
+            opts[CurlOpt.CAINFO] = self.verify
 
         # referer
         if referer:
-            c.setopt(CurlOpt.REFERER, referer.encode())
+            opts[CurlOpt.REFERER] = referer.encode()
 
         # accept_encoding
         if accept_encoding is not None:
-            c.setopt(CurlOpt.ACCEPT_ENCODING, accept_encoding.encode())
+            opts[CurlOpt.ACCEPT_ENCODING] = accept_encoding.encode()
 
+    def _set_impersonate_options(
+        self,
+        curl,
+        opts: Dict[CurlOpt, Any],
+        *,
+        impersonate: Optional[Union[str, BrowserType]] = None,
+        default_headers: Optional[bool] = None,
+        http_version: Optional[CurlHttpVersion] = None,
+        interface: Optional[str] = None,
+        max_recv_speed: int = 0,
+    ):
+        """Impersonate and collect the options which must come after it."""
         # impersonate
         impersonate = impersonate or self.impersonate
         default_headers = (
@@ -367,118 +1023,153 @@ class BaseSession:
         if impersonate:
             if not BrowserType.has(impersonate):
                 raise RequestsError(f"impersonate {impersonate} is not supported")
-            c.impersonate(impersonate, default_headers=default_headers)
+            curl.impersonate(impersonate, default_headers=default_headers)
+        elif curl._impersonation is not None:
+            # left by a previous request on this handle
+            curl._clear_impersonation()
 
         # http_version, after impersonate, which will change this to http2
         http_version = http_version or self.http_version
         if http_version:
-            c.setopt(CurlOpt.HTTP_VERSION, http_version)
+            opts[CurlOpt.HTTP_VERSION] = http_version
 
         # set extra curl options, must come after impersonate, because it will alter some options
-        for k, v in self.curl_options.items():
-            c.setopt(k, v)
-
-        buffer = None
-        q = None
-        header_recved = None
-        quit_now = None
-        if stream:
-            q = queue_class()  # type: ignore
-            header_recved = event_class()
-            quit_now = event_class()
-
-            def qput(chunk):
-                if not header_recved.is_set():
-                    header_recved.set()
-                if quit_now.is_set():
-                    return CURL_WRITEFUNC_ERROR
-                q.put_nowait(chunk)
-                return len(chunk)
-
-            c.setopt(CurlOpt.WRITEFUNCTION, qput)  # type: ignore
-        elif content_callback is not None:
-            c.setopt(CurlOpt.WRITEFUNCTION, content_callback)
-        else:
-            buffer = BytesIO()
-            c.setopt(CurlOpt.WRITEDATA, buffer)
-        header_buffer = BytesIO()
-        c.setopt(CurlOpt.HEADERDATA, header_buffer)
-
-        if method == "HEAD":
-            c.setopt(CurlOpt.NOBODY, 1)
+        opts.update(self.curl_options)
 
         # interface
         interface = interface or self.interface
         if interface:
-            c.setopt(CurlOpt.INTERFACE, interface.encode())
+            opts[CurlOpt.INTERFACE] = interface.encode()
 
         # max_recv_speed
         # do not check, since 0 is a valid value to disable it
-        c.setopt(CurlOpt.MAX_RECV_SPEED_LARGE, max_recv_speed)
+        opts[CurlOpt.MAX_RECV_SPEED_LARGE] = max_recv_speed
 
-        return req, buffer, header_buffer, q, header_recved, quit_now
+    def template(
+        self,
+        *,
+        headers: Optional[HeaderTypes] = None,
+        auth: Optional[Tuple[str, str]] = None,
+        timeout: Optional[Union[float, Tuple[float, float], object]] = not_set,
+        allow_redirects: Optional[bool] = None,
+        max_redirects: Optional[int] = None,
+        proxies: Optional[dict] = None,
+        verify: Optional[Union[bool, str]] = None,
+        referer: Optional[str] = None,
+        accept_encoding: Optional[str] = "gzip, deflate, br",
+        impersonate: Optional[Union[str, BrowserType]] = None,
+        default_headers: Optional[bool] = None,
+        http_version: Optional[CurlHttpVersion] = None,
+        interface: Optional[str] = None,
+        max_recv_speed: int = 0,
+    ) -> "RequestTemplate":
+        """Prepare the static options shared by many requests once, and reuse them.
+
+        The options are applied to a curl handle, which is duplicated for every
+        request, only the url, body, cookies and extra headers are set per request.
+        Parameters not given fall back to the session ones, see
+        [curl_cffi.requests.request](/api/curl_cffi.requests/#curl_cffi.requests.request)
+        for their meanings.
+
+        Returns:
+            A `RequestTemplate`, use its `request`/`get`/`post`... methods.
+
+        Notes:
+            ```
+            with Session() as s:
+                tpl = s.template(impersonate="chrome110", timeout=10)
+                for url in urls:
+                    r = tpl.get(url)
+            ```
+        """
+        curl = self._create_curl()
+        h = Headers(self.headers)
+        h.update(headers)
+        opts: Dict[CurlOpt, Any] = {}
+        opts[CurlOpt.HTTPHEADER] = h.to_curl_lines()
+        self._set_static_options(
+            opts,
+            auth=auth,
+            timeout=timeout,
+            allow_redirects=allow_redirects,
+            max_redirects=max_redirects,
+            verify=verify,
+            referer=referer,
+            accept_encoding=accept_encoding,
+        )
+        curl.setopts(opts)
+        opts = {}
+        self._set_impersonate_options(
+            curl,
+            opts,
+            impersonate=impersonate,
+            default_headers=default_headers,
+            http_version=http_version,
+            interface=interface,
+            max_recv_speed=max_recv_speed,
+        )
+        curl.setopts(opts)
+        curl._ensure_cacert()
+        return RequestTemplate(
+            self,
+            curl,
+            headers=h,
+            proxies={**self.proxies, **(proxies or {})},
+            timeout=self.timeout if timeout is not_set else timeout,
+        )
 
     def _parse_response(self, curl, buffer, header_buffer):
         c = curl
-        rsp = Response(c)
-        rsp.url = cast(bytes, c.getinfo(CurlInfo.EFFECTIVE_URL)).decode()
+        raw_headers = header_buffer.getvalue()
+        # headers, reason and encoding are parsed from the raw bytes when accessed.
+        rsp = Response(c, raw_headers=raw_headers)
         if buffer:
             rsp.content = buffer.getvalue()  # type: ignore
-        rsp.http_version = cast(int, c.getinfo(CurlInfo.HTTP_VERSION))
-        rsp.status_code = cast(int, c.getinfo(CurlInfo.RESPONSE_CODE))
+        (
+            rsp.status_code,
+            rsp.http_version,
+            rsp.redirect_count,
+            rsp.elapsed,
+            url,
+            rsp.redirect_url,
+        ) = c.response_info()
+        rsp.url = url.decode()
         rsp.ok = 200 <= rsp.status_code < 400
-        header_lines = header_buffer.getvalue().splitlines()
 
         # TODO history urls
-        header_list = []
-        for header_line in header_lines:
-            if not header_line.strip():
-                continue
-            if header_line.startswith(b"HTTP/"):
-                # read header from last response
-                rsp.reason = c.get_reason_phrase(header_line).decode()
-                # empty header list for new redirected response
-                header_list = []
-                continue
-            if header_line.startswith(b" ") or header_line.startswith(b"\t"):
-                header_list[-1] += header_line
-                continue
-            header_list.append(header_line)
-        rsp.headers = Headers(header_list)
-        # print("Set-cookie", rsp.headers["set-cookie"])
-        morsels = [
-            CurlMorsel.from_curl_format(l) for l in c.getinfo(CurlInfo.COOKIELIST)
-        ]
-        # for l in c.getinfo(CurlInfo.COOKIELIST):
-        #     print("Curl Cookies", l.decode())
-
-        self.cookies.update_cookies_from_curl(morsels)
+        # the cookies in curl are the ones sent, except those set by the response.
+        names = set(_SET_COOKIE.findall(raw_headers))
+        if names:
+            morsels = [
+                CurlMorsel.from_curl_format(l)
+                for l in c.getinfo(CurlInfo.COOKIELIST)
+                if l.split(b"\t", 6)[5] in names  # type: ignore
+            ]
+            self.cookies.update_cookies_from_curl(morsels)
         rsp.cookies = self.cookies
-        # print("Cookies after extraction", self.cookies)
-
-        content_type = rsp.headers.get("Content-Type", default="")
-        m = re.search(r"charset=([\w-]+)", content_type)
-        charset = m.group(1) if m else "utf-8"
-
-        rsp.charset = charset
-        rsp.encoding = charset  # TODO use chardet
-
-        rsp.elapsed = cast(float, c.getinfo(CurlInfo.TOTAL_TIME))
-        rsp.redirect_count = cast(int, c.getinfo(CurlInfo.REDIRECT_COUNT))
-        rsp.redirect_url = cast(bytes, c.getinfo(CurlInfo.REDIRECT_URL)).decode()
 
         for info in self.curl_infos:
             rsp.infos[info] = c.getinfo(info)
 
         return rsp
 
+    @staticmethod
+    def _event_headers(headers: Optional[HeaderTypes], parser: _EventParser) -> Headers:
+        h = Headers(headers)
+        h["Accept"] = "text/event-stream"
+        h["Cache-Control"] = "no-cache"
+        if parser.last_event_id:
+            h["Last-Event-ID"] = parser.last_event_id
+        return h
+
 
 # ThreadType = Literal["eventlet", "gevent", None]
 
 
 class Session(BaseSession):
     """A request session, cookies and connections will be reused. This object is thread-safe,
-    but it's recommended to use a seperate session for each thread."""
+    but it's recommended to use a seperate session for each thread. Connections, DNS
+    cache and TLS sessions are shared among the curl handles of all threads."""
 
     def __init__(
         self,
@@ -508,6 +1199,18 @@ class Session(BaseSession):
             max_redirects: max redirect counts, default unlimited(-1).
             impersonate: which browser version to impersonate in the session.
             interface: which interface use in request to server.
+            max_buffered_bytes: max bytes of a streamed response received ahead of the consumer,
+                the transfer is paused until they are consumed. Data is only received when
+                iterating the response, by default one chunk is buffered.
+            share_connections: reuse the connections of the session across its curl
+                handles, e.g. of streams, templates and other threads. libcurl does not
+                support it for handles performing concurrently in different threads, so
+                only turn it on if the session is used from one thread at a time.
+            bulk_cookies: load 256 cookies or more into a curl handle at once, through a
+                temporary cookie file, instead of one COOKIELIST command per cookie.
+                Off by default, since every cookie value, session and auth tokens
+                included, is then written to disk, in a file only readable by the user
+                and removed right after.
 
         Notes:
             This class can be used as a context manager.
@@ -530,9 +1233,9 @@ class Session(BaseSession):
                 self._local.curl = curl
             else:
                 self._is_customized_curl = False
-                self._local.curl = Curl(debug=self.debug)
+                self._local.curl = self._create_curl()
         else:
-            self._curl = curl if curl else Curl(debug=self.debug)
+            self._curl = curl if curl else self._create_curl()
 
     @property
     def curl(self):
@@ -540,13 +1243,14 @@ class Session(BaseSession):
             if self._is_customized_curl:
                 warnings.warn("Creating fresh curl handle in different thread.")
             if not getattr(self._local, "curl", None):
-                self._local.curl = Curl(debug=self.debug)
+                self._local.curl = self._create_curl()
             return self._local.curl
         else:
             return self._curl
 
     @property
     def executor(self):
+        """A thread pool for callers, created on first use. Streams no longer run in it."""
         if self._executor is None:
             self._executor = ThreadPoolExecutor()
         return self._executor
@@ -560,6 +1264,7 @@ class Session(BaseSession):
     def close(self):
         """Close the session."""
         self.curl.close()
+        self._share.close()
 
     @contextmanager
     def stream(self, *args, **kwargs):
@@ -569,12 +1274,65 @@ class Session(BaseSession):
         finally:
             rsp.close()
 
+    def events(
+        self,
+        url: str,
+        method: str = "GET",
+        *,
+        headers: Optional[HeaderTypes] = None,
+        retry: int = 3000,
+        max_retries: Optional[int] = None,
+        **kwargs,
+    ) -> Iterator[ServerSentEvent]:
+        """Subscribe to a `text/event-stream`, reconnecting when the connection is lost.
+
+        On reconnection, the last event ID received is sent as `Last-Event-ID`, after
+        waiting for the reconnection time given by the server, or `retry`.
+
+        Parameters:
+            url: url of the event stream.
+            method: http method, usually GET.
+            headers: headers to send, `Accept` and `Last-Event-ID` are added.
+            retry: reconnection time in milliseconds, unless the server sends one.
+            max_retries: give up after this many reconnections in a row without any
+                event received, None to retry forever.
+            kwargs: other parameters passed to `request`.
+
+        A 204 response ends the subscription, other non-2xx responses raise a
+        `RequestsError`, as do connection errors once `max_retries` is exceeded.
+        """
+        parser = _EventParser()
+        failures = 0
+        while True:
+            parser.new_stream()
+            try:
+                with self.stream(
+                    method, url, headers=self._event_headers(headers, parser), **kwargs
+                ) as rsp:
+                    if rsp.status_code == 204:
+                        return
+                    if not rsp.ok:
+                        # not worth retrying, as with a browser EventSource
+                        rsp.raise_for_status()
+                    for chunk in rsp.iter_content():
+                        for event in parser.feed(chunk):
+                            failures = 0
+                            yield event
+            except RequestsError as e:
+                # only connection errors are retried, not http, tls or usage errors
+                if e.code not in _EVENTS_RETRIED_ERRORS:
+                    raise
+            failures += 1
+            if max_retries is not None and failures > max_retries:
+                raise RequestsError(f"Event stream lost after {max_retries} retries")
+            time.sleep((parser.retry if parser.retry is not None else retry) / 1000)
+
     def request(
         self,
         method: str,
         url: str,
         params: Optional[dict] = None,
-        data: Optional[Union[Dict[str, str], str, BytesIO, bytes]] = None,
+        data: Optional[Union[Dict[str, str], str, BytesIO, bytes, Iterable]] = None,
         json: Optional[dict] = None,
         headers: Optional[HeaderTypes] = None,
         cookies: Optional[CookieTypes] = None,
@@ -594,13 +1352,21 @@ class Session(BaseSession):
         interface: Optional[str] = None,
         stream: bool = False,
         max_recv_speed: int = 0,
+        template: Optional["RequestTemplate"] = None,
     ) -> Response:
-        """Send the request, see [curl_cffi.requests.request](/api/curl_cffi.requests/#curl_cffi.requests.request) for details on parameters."""
+        """Send the request, see [curl_cffi.requests.request](/api/curl_cffi.requests/#curl_cffi.requests.request) for details on parameters.
 
+        If `template` is given, the static options prepared by `Session.template` are used,
+        and the corresponding parameters here are ignored.
+        """
+
+        if template is not None:
+            # a fresh handle with the static options already set, closed after the request
+            c = template.duphandle()
         # clone a new curl instance for streaming response
-        if stream:
+        elif stream:
             c = self.curl.duphandle()
-            self.curl.reset()
+            self.curl.reset(incremental=True)
         else:
             c = self.curl
 
@@ -629,69 +1395,206 @@ class Session(BaseSession):
             interface=interface,
             stream=stream,
             max_recv_speed=max_recv_speed,
-            queue_class=queue.Queue,
+            queue_class=partial(
+                _SyncStreamQueue, self.max_buffered_bytes or 0, self._call_blocking
+            ),
             event_class=threading.Event,
+            template=template,
         )
 
-        if stream:
-            header_parsed = threading.Event()
-
-            def perform():
-                try:
-                    c.perform()
-                except CurlError as e:
-                    rsp = self._parse_response(c, buffer, header_buffer)
-                    rsp.request = req
-                    q.put_nowait(RequestsError(str(e), e.code, rsp))  # type: ignore
-                finally:
-                    if not header_recved.is_set():  # type: ignore
-                        header_recved.set()  # type: ignore
-                    # None acts as a sentinel
-                    q.put(None)  # type: ignore
+        def release():
+            if template is not None:
+                c.close()
+            else:
+                # only revert what this request set, keep the handle warm
+                c.reset(incremental=True)
 
-            def cleanup(fut):
-                header_parsed.wait()
-                c.reset()
+        if stream:
+            # the transfer is driven by the consumer, see `_SyncStreamQueue`
+            def make_error(e: CurlError) -> RequestsError:
+                rsp = self._parse_response(c, buffer, header_buffer)
+                rsp.request = req
+                return _request_error(e, rsp)
 
-            stream_task = self.executor.submit(perform)
-            stream_task.add_done_callback(cleanup)
+            # the duplicated handle is closed once the transfer is finished or aborted
+            q.start(c, make_error, c.close)  # type: ignore
 
             # Wait for the first chunk
-            header_recved.wait()  # type: ignore
+            first_element = q.peek()  # type: ignore
             rsp = self._parse_response(c, buffer, header_buffer)
-            header_parsed.set()
 
             # Raise the exception if something wrong happens when receiving the header.
-            first_element = _peek_queue(q)  # type: ignore
             if isinstance(first_element, RequestsError):
-                c.reset()
+                q.result()  # type: ignore
                 raise first_element
 
             rsp.request = req
-            rsp.stream_task = stream_task  # type: ignore
+            rsp.stream_task = q  # type: ignore
             rsp.quit_now = quit_now  # type: ignore
-            rsp.queue = q
+            rsp.queue = q  # type: ignore
             return rsp
         else:
             try:
-                if self._thread == "eventlet":
-                    # see: https://eventlet.net/doc/threading.html
-                    eventlet.tpool.execute(c.perform)
-                elif self._thread == "gevent":
-                    # see: https://www.gevent.org/api/gevent.threadpool.html
-                    gevent.get_hub().threadpool.spawn(c.perform).get()
-                else:
-                    c.perform()
+                self._call_blocking(c.perform)
             except CurlError as e:
                 rsp = self._parse_response(c, buffer, header_buffer)
                 rsp.request = req
-                raise RequestsError(str(e), e.code, rsp) from e
+                raise _request_error(e, rsp)
             else:
                 rsp = self._parse_response(c, buffer, header_buffer)
                 rsp.request = req
                 return rsp
             finally:
-                c.reset()
+                release()
+
+    def _call_blocking(self, fn: Callable[[], Any]) -> Any:
+        """Call fn, which blocks on the network, without blocking the hub of green
+        threads if there is one."""
+        if self._thread == "eventlet":
+            # see: https://eventlet.net/doc/threading.html
+            return eventlet.tpool.execute(fn)
+        elif self._thread == "gevent":
+            # see: https://www.gevent.org/api/gevent.threadpool.html
+            return gevent.get_hub().threadpool.spawn(fn).get()
+        return fn()
+
+    def download(
+        self,
+        url: str,
+        path_or_fd: Union[str, os.PathLike, int],
+        *,
+        resume: bool = False,
+        preallocate: bool = False,
+        method: str = "GET",
+        **kwargs,
+    ) -> Response:
+        """Download the body of url straight into a file, libcurl writes it from C
+        without a python call per chunk.
+
+        Parameters:
+            url: url to download.
+            path_or_fd: path of the file, or a file descriptor opened for writing,
+                which is written from its current position.
+            resume: continue after what's already in the file, with a range request.
+                If the server ignores the range, the file is written from the start.
+            preallocate: reserve the space of the file with `posix_fallocate`, when
+                the content length is known.
+            method: http method.
+            kwargs: other parameters passed to `request`, the body is never decoded, so
+                `accept_encoding`, `stream` and `content_callback` are not accepted.
+
+        Returns:
+            the response, its `content` is empty. Only the body of a 2xx response is
+            written to the file.
+        """
+        _Download.check_kwargs(kwargs)
+        c = self.curl
+        dl = _Download(path_or_fd, resume, preallocate)
+        succeeded = False
+        try:
+            req, _, _, _, _, _ = self._set_curl_options(
+                c, method, url, accept_encoding=None, **kwargs
+            )
+            c.setopts(dl.options(c))
+            try:
+                self._call_blocking(c.perform)
+            except CurlError as e:
+                rsp = self._parse_response(c, None, dl.header_buffer)
+                rsp.request = req
+                raise RequestsError(str(e), e.code, rsp) from (dl.write_error() or e)
+            rsp = self._parse_response(c, None, dl.header_buffer)
+            rsp.request = req
+            succeeded = True
+            return rsp
+        finally:
+            c.reset(incremental=True)
+            dl.finish(check=succeeded)
+
+    def fetch_many(
+        self,
+        requests: Iterable[Union[str, dict]],
+        concurrency: int = 10,
+        return_exceptions: bool = False,
+    ) -> Iterator[Response]:
+        """Send many requests concurrently on the calling thread, yield responses as they finish.
+
+        The transfers are driven by one curl multi handle, without asyncio or threads.
+        Requests are taken from the input lazily, only when a slot is free.
+
+        Parameters:
+            requests: an iterable of urls to GET, or dicts of arguments to `request`,
+                e.g. `{"method": "POST", "url": url, "json": {}}`. Streaming is not supported.
+            concurrency: max transfers in flight.
+            return_exceptions: yield exceptions instead of raising them.
+
+        Notes:
+            Responses are yielded in completion order, use `response.request` to find
+            out which one it is.
+            ```
+            with Session() as s:
+                for r in s.fetch_many(urls, concurrency=100):
+                    print(r.request.url, r.status_code)
+            ```
+        """
+        multi = CurlMulti()
+        idle: List[Curl] = []
+        inflight: Dict[Curl, Tuple[Request, Any, BytesIO]] = {}
+        it = iter(requests)
+        exhausted = False
+
+        def fill():
+            nonlocal exhausted
+            while not exhausted and len(inflight) < concurrency:
+                try:
+                    item = next(it)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if isinstance(item, str):
+                    item = {"url": item}
+                kwargs = dict(item)
+                if kwargs.pop("stream", False):
+                    raise RequestsError("stream is not supported in fetch_many")
+                c = idle.pop() if idle else self._create_curl()
+                req, buffer, header_buffer, _, _, _ = self._set_curl_options(
+                    c, kwargs.pop("method", "GET"), kwargs.pop("url"), **kwargs
+                )
+                multi.add_handle(c)
+                inflight[c] = (req, buffer, header_buffer)
+
+        try:
+            fill()
+            while inflight:
+                multi.perform()
+                done = multi.info_read()
+                if not done:
+                    self._call_blocking(multi.poll)
+                    continue
+                results: List[Union[Response, RequestsError]] = []
+                for c, error in done:
+                    req, buffer, header_buffer = inflight.pop(c)
+                    c.clean_after_perform()
+                    rsp = self._parse_response(c, buffer, header_buffer)
+                    rsp.request = req
+                    if error is not None:
+                        results.append(_request_error(error, rsp))
+                    else:
+                        results.append(rsp)
+                    c.reset(incremental=True)
+                    idle.append(c)
+                # start the next transfers before handing out the responses
+                fill()
+                for result in results:
+                    if isinstance(result, RequestsError) and not return_exceptions:
+                        raise result
+                    yield result  # type: ignore
+        finally:
+            for c in inflight:
+                multi.remove_handle(c)
+                c.close()
+            for c in idle:
+                c.close()
+            multi.close()
 
     head = partialmethod(request, "HEAD")
     get = partialmethod(request, "GET")
@@ -711,6 +1614,12 @@ class AsyncSession(BaseSession):
         loop=None,
         async_curl: Optional[AsyncCurl] = None,
         max_clients: int = 10,
+        max_host_connections: int = 0,
+        max_total_connections: int = 0,
+        max_concurrent_streams: int = 0,
+        multiplex: bool = True,
+        pipewait: bool = False,
+        epoll: bool = False,
         **kwargs,
     ):
         """
@@ -720,6 +1629,15 @@ class AsyncSession(BaseSession):
             loop: loop to use, if not provided, the running loop will be used.
             async_curl: [AsyncCurl](/api/curl_cffi#curl_cffi.AsyncCurl) object to use.
             max_clients: maxmium curl handle to use in the session, this will affect the concurrency ratio.
+            max_host_connections: max connections to a single host, 0 means unlimited.
+                Requests over the limit wait for a free connection.
+            max_total_connections: max connections in total, 0 means unlimited.
+            max_concurrent_streams: max HTTP/2 streams on one connection, 0 means libcurl's default (100).
+            multiplex: whether to multiplex requests over HTTP/2 connections.
+            pipewait: wait for an existing connection to tell if it can multiplex, instead of
+                opening a new one. Turn it on when firing many requests to a HTTP/2 host at once.
+            epoll: watch the sockets with a private epoll set, registering only one fd with the
+                loop, see [AsyncCurl](/api/curl_cffi#curl_cffi.AsyncCurl). Linux only.
             headers: headers to use in the session.
             cookies: cookies to add in the session.
             auth: HTTP basic auth, a tuple of (username, password), only basic auth is supported.
@@ -731,6 +1649,13 @@ class AsyncSession(BaseSession):
             allow_redirects: whether to allow redirection.
             max_redirects: max redirect counts, default unlimited(-1).
             impersonate: which browser version to impersonate in the session.
+            max_buffered_bytes: max bytes of a streamed response received ahead of the consumer,
+                the transfer is paused until half of them are consumed. Default unlimited.
+            bulk_cookies: load 256 cookies or more into a curl handle at once, through a
+                temporary cookie file, instead of one COOKIELIST command per cookie.
+                Off by default, since every cookie value, session and auth tokens
+                included, is then written to disk, in a file only readable by the user
+                and removed right after.
 
         Notes:
             This class can be used as a context manager, and it's recommended to use via `async with`.
@@ -745,17 +1670,45 @@ class AsyncSession(BaseSession):
         self.loop = loop
         self._acurl = async_curl
         self.max_clients = max_clients
+        self.max_host_connections = max_host_connections
+        self.max_total_connections = max_total_connections
+        self.max_concurrent_streams = max_concurrent_streams
+        self.multiplex = multiplex
+        self.pipewait = pipewait
+        self.epoll = epoll
         self._closed = False
         self.init_pool()
+        if self._acurl is not None:
+            self._set_multi_options(self._acurl)
 
     @property
     def acurl(self):
         if self.loop is None:
             self.loop = asyncio.get_running_loop()
         if self._acurl is None:
-            self._acurl = AsyncCurl(loop=self.loop)
+            self._acurl = AsyncCurl(loop=self.loop, epoll=self.epoll)
+            self._set_multi_options(self._acurl)
         return self._acurl
 
+    def _set_multi_options(self, acurl: AsyncCurl):
+        acurl.setopt(CurlMOpt.PIPELINING, 2 if self.multiplex else 0)  # CURLPIPE_MULTIPLEX
+        if self.max_host_connections:
+            acurl.setopt(CurlMOpt.MAX_HOST_CONNECTIONS, self.max_host_connections)
+        if self.max_total_connections:
+            acurl.setopt(CurlMOpt.MAX_TOTAL_CONNECTIONS, self.max_total_connections)
+        if self.max_concurrent_streams:
+            acurl.setopt(CurlMOpt.MAX_CONCURRENT_STREAMS, self.max_concurrent_streams)
+
+    def _body_reader(self, curl: Curl, data: Any) -> Optional[Tuple[Any, int]]:
+        if isinstance(data, AsyncIterable):
+            return _AsyncIterBody(curl, data), -1
+        return super()._body_reader(curl, data)
+
+    def _set_static_options(self, opts: Dict[CurlOpt, Any], **kwargs):
+        super()._set_static_options(opts, **kwargs)
+        if self.pipewait:
+            opts[CurlOpt.PIPEWAIT] = 1
+
     def init_pool(self):
         self.pool = asyncio.LifoQueue(self.max_clients)
         while True:
@@ -767,7 +1720,7 @@ class AsyncSession(BaseSession):
     async def pop_curl(self):
         curl = await self.pool.get()
         if curl is None:
-            curl = Curl(debug=self.debug)
+            curl = self._create_curl()
         return curl
 
     def push_curl(self, curl):
@@ -794,15 +1747,141 @@ class AsyncSession(BaseSession):
                     curl.close()
             except asyncio.QueueEmpty:
                 break
+        self._share.close()
 
-    def release_curl(self, curl):
+    def release_curl(
+        self, curl, template: Optional["RequestTemplate"] = None, slot: Optional[Curl] = None
+    ):
         curl.clean_after_perform()
         if not self._closed:
             self.acurl.remove_handle(curl)
-            curl.reset()
-            self.push_curl(curl)
+            if template is not None:
+                # handles duplicated from templates are not reused, give back the slot only
+                curl.close()
+                self.push_curl(slot)
+            else:
+                curl.reset(incremental=True)
+                self.push_curl(curl)
         else:
             curl.close()
+            if slot is not None:
+                slot.close()
+
+    async def map(
+        self,
+        requests: Union[Iterable[Union[str, dict]], AsyncIterable[Union[str, dict]]],
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Response]:
+        """Send many requests with bounded concurrency, yield responses as they finish.
+
+        Requests are taken from the input lazily, only when a slot is free, so the
+        memory used does not grow with the length of the input.
+
+        Parameters:
+            requests: an iterable or async iterable of urls to GET, or dicts of
+                arguments to `request`, e.g. `{"method": "POST", "url": url, "json": {}}`.
+            concurrency: max requests in flight, defaults to `max_clients`.
+            return_exceptions: yield exceptions instead of raising them.
+
+        Notes:
+            Responses are yielded in completion order, use `response.request` to find
+            out which one it is.
+            ```
+            async with AsyncSession() as s:
+                async for r in s.map(urls, concurrency=100):
+                    print(r.request.url, r.status_code)
+            ```
+        """
+        concurrency = concurrency or self.max_clients
+        if hasattr(requests, "__aiter__"):
+            ait = requests.__aiter__()  # type: ignore
+            it = None
+        else:
+            ait = None
+            it = iter(requests)  # type: ignore
+        exhausted = False
+        pending: Set[asyncio.Future] = set()
+
+        async def fill():
+            nonlocal exhausted
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    if ait is not None:
+                        item = await ait.__anext__()
+                    else:
+                        item = next(it)  # type: ignore
+                except (StopIteration, StopAsyncIteration):
+                    exhausted = True
+                    break
+                if isinstance(item, str):
+                    coro = self.request("GET", item)
+                else:
+                    kwargs = dict(item)
+                    coro = self.request(
+                        kwargs.pop("method", "GET"), kwargs.pop("url"), **kwargs
+                    )
+                pending.add(asyncio.ensure_future(coro))
+
+        try:
+            await fill()
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # keep the slots busy while the responses are consumed
+                await fill()
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        yield task.result()
+                    elif return_exceptions:
+                        yield exc  # type: ignore
+                    else:
+                        raise exc
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def download(
+        self,
+        url: str,
+        path_or_fd: Union[str, os.PathLike, int],
+        *,
+        resume: bool = False,
+        preallocate: bool = False,
+        method: str = "GET",
+        **kwargs,
+    ) -> Response:
+        """Download the body of url straight into a file, see `Session.download`."""
+        _Download.check_kwargs(kwargs)
+        curl = await self.pop_curl()
+        try:
+            dl = _Download(path_or_fd, resume, preallocate)
+        except BaseException:
+            self.release_curl(curl)
+            raise
+        succeeded = False
+        try:
+            req, _, _, _, _, _ = self._set_curl_options(
+                curl, method, url, accept_encoding=None, **kwargs
+            )
+            curl.setopts(dl.options(curl))
+            try:
+                await self.acurl.add_handle(curl)
+            except CurlError as e:
+                rsp = self._parse_response(curl, None, dl.header_buffer)
+                rsp.request = req
+                raise RequestsError(str(e), e.code, rsp) from (dl.write_error() or e)
+            rsp = self._parse_response(curl, None, dl.header_buffer)
+            rsp.request = req
+            succeeded = True
+            return rsp
+        finally:
+            self.release_curl(curl)
+            dl.finish(check=succeeded)
 
     @asynccontextmanager
     async def stream(self, *args, **kwargs):
@@ -812,12 +1891,50 @@ class AsyncSession(BaseSession):
         finally:
             await rsp.aclose()
 
+    async def events(
+        self,
+        url: str,
+        method: str = "GET",
+        *,
+        headers: Optional[HeaderTypes] = None,
+        retry: int = 3000,
+        max_retries: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[ServerSentEvent]:
+        """Subscribe to a `text/event-stream`, reconnecting when the connection is lost,
+        see `Session.events` for details."""
+        parser = _EventParser()
+        failures = 0
+        while True:
+            parser.new_stream()
+            try:
+                async with self.stream(
+                    method, url, headers=self._event_headers(headers, parser), **kwargs
+                ) as rsp:
+                    if rsp.status_code == 204:
+                        return
+                    if not rsp.ok:
+                        rsp.raise_for_status()
+                    async for chunk in rsp.aiter_content():
+                        for event in parser.feed(chunk):
+                            failures = 0
+                            yield event
+            except RequestsError as e:
+                if e.code not in _EVENTS_RETRIED_ERRORS:
+                    raise
+            failures += 1
+            if max_retries is not None and failures > max_retries:
+                raise RequestsError(f"Event stream lost after {max_retries} retries")
+            await asyncio.sleep((parser.retry if parser.retry is not None else retry) / 1000)
+
     async def request(
         self,
         method: str,
         url: str,
         params: Optional[dict] = None,
-        data: Optional[Union[Dict[str, str], str, BytesIO, bytes]] = None,
+        data: Optional[
+            Union[Dict[str, str], str, BytesIO, bytes, Iterable, AsyncIterable]
+        ] = None,
         json: Optional[dict] = None,
         headers: Optional[HeaderTypes] = None,
         cookies: Optional[CookieTypes] = None,
@@ -837,9 +1954,20 @@ class AsyncSession(BaseSession):
         interface: Optional[str] = None,
         stream: bool = False,
         max_recv_speed: int = 0,
+        template: Optional["RequestTemplate"] = None,
     ):
-        """Send the request, see [curl_cffi.requests.request](/api/curl_cffi.requests/#curl_cffi.requests.request) for details on parameters."""
-        curl = await self.pop_curl()
+        """Send the request, see [curl_cffi.requests.request](/api/curl_cffi.requests/#curl_cffi.requests.request) for details on parameters.
+
+        If `template` is given, the static options prepared by `AsyncSession.template` are used,
+        and the corresponding parameters here are ignored.
+        """
+        if template is not None:
+            # still take a slot from the pool, to respect max_clients
+            slot = await self.pool.get()
+            curl = template.duphandle()
+        else:
+            slot = None
+            curl = await self.pop_curl()
         req, buffer, header_buffer, q, header_recved, quit_now = self._set_curl_options(
             curl=curl,
             method=method,
@@ -865,8 +1993,9 @@ class AsyncSession(BaseSession):
             interface=interface,
             stream=stream,
             max_recv_speed=max_recv_speed,
-            queue_class=asyncio.Queue,
+            queue_class=partial(_AsyncStreamQueue, curl, self.max_buffered_bytes),
             event_class=asyncio.Event,
+            template=template,
         )
         if stream:
             task = self.acurl.add_handle(curl)
@@ -877,7 +2006,7 @@ class AsyncSession(BaseSession):
                 except CurlError as e:
                     rsp = self._parse_response(curl, buffer, header_buffer)
                     rsp.request = req
-                    q.put_nowait(RequestsError(str(e), e.code, rsp))  # type: ignore
+                    q.put_nowait(_request_error(e, rsp))  # type: ignore
                 finally:
                     if not header_recved.is_set():  # type: ignore
                         header_recved.set()  # type: ignore
@@ -885,7 +2014,7 @@ class AsyncSession(BaseSession):
                     await q.put(None)  # type: ignore
 
             def cleanup(fut):
-                self.release_curl(curl)
+                self.release_curl(curl, template, slot)
 
             stream_task = asyncio.create_task(perform())
             stream_task.add_done_callback(cleanup)
@@ -899,7 +2028,7 @@ class AsyncSession(BaseSession):
 
             first_element = _peek_aio_queue(q)  # type: ignore
             if isinstance(first_element, RequestsError):
-                self.release_curl(curl)
+                self.release_curl(curl, template, slot)
                 raise first_element
 
             rsp.request = req
@@ -916,13 +2045,73 @@ class AsyncSession(BaseSession):
             except CurlError as e:
                 rsp = self._parse_response(curl, buffer, header_buffer)
                 rsp.request = req
-                raise RequestsError(str(e), e.code, rsp) from e
+                raise _request_error(e, rsp)
             else:
                 rsp = self._parse_response(curl, buffer, header_buffer)
                 rsp.request = req
                 return rsp
             finally:
-                self.release_curl(curl)
+                self.release_curl(curl, template, slot)
+
+    head = partialmethod(request, "HEAD")
+    get = partialmethod(request, "GET")
+    post = partialmethod(request, "POST")
+    put = partialmethod(request, "PUT")
+    patch = partialmethod(request, "PATCH")
+    delete = partialmethod(request, "DELETE")
+    options = partialmethod(request, "OPTIONS")
+
+
+class RequestTemplate:
+    """Static options prepared once by `Session.template` or `AsyncSession.template`.
+
+    Every request duplicates the prepared curl handle, so only the url, body, cookies
+    and extra headers are set for each request.
+    """
+
+    def __init__(
+        self,
+        session: BaseSession,
+        curl: Curl,
+        *,
+        headers: Headers,
+        proxies: dict,
+        timeout: Optional[Union[float, Tuple[float, float]]],
+    ):
+        self.session = session
+        self.curl = curl
+        self.headers = headers
+        self.proxies = proxies
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def duphandle(self) -> Curl:
+        """Duplicate the prepared curl handle for a new request."""
+        with self._lock:
+            if self.curl is None:
+                raise RequestsError("Template is already closed.")
+            c = self.curl.duphandle()
+        # the ca bundle has been set on the prepared handle
+        c._is_cert_set = True
+        return c
+
+    def close(self):
+        """Close the prepared curl handle."""
+        with self._lock:
+            if self.curl is not None:
+                self.curl.clean_after_perform()
+                self.curl.close()
+                self.curl = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def request(self, method: str, url: str, **kwargs):
+        """Send the request with the session, returns a coroutine for `AsyncSession`."""
+        return self.session.request(method, url, template=self, **kwargs)  # type: ignore
 
     head = partialmethod(request, "HEAD")
     get = partialmethod(request, "GET")
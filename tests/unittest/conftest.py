@@ -83,6 +83,10 @@ async def app(scope, receive, send):
         await echo_params(scope, receive, send)
     elif scope["path"].startswith("/stream"):
         await stream(scope, receive, send)
+    elif scope["path"].startswith("/events"):
+        await events(scope, receive, send)
+    elif scope["path"].startswith("/range"):
+        await range_body(scope, receive, send)
     elif scope["path"].startswith("/large"):
         await large(scope, receive, send)
     elif scope["path"].startswith("/empty_body"):
@@ -181,6 +185,30 @@ async def slow_response(scope, receive, send):
     await send({"type": "http.response.body", "body": b"Hello, world!"})
 
 
+async def events(scope, receive, send):
+    """Sends two events per connection, resuming after Last-Event-ID, up to id 4."""
+    headers = dict(scope.get("headers", []))
+    last_id = int(headers.get(b"last-event-id", b"0"))
+    if last_id >= 4:
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [[b"content-type", b"text/event-stream"]],
+        }
+    )
+    body = b"retry: 10\n: keep-alive\n\n"
+    for i in range(last_id + 1, last_id + 3):
+        body += b"event: tick\r\nid: %d\r\ndata: line 1\r\ndata: %d\r\n\r\n" % (i, i)
+    # send in small pieces, to split the fields and line endings
+    for i in range(0, len(body), 7):
+        await send({"type": "http.response.body", "body": body[i : i + 7], "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
 async def status_code(scope, receive, send):
     status_code = int(scope["path"].replace("/status/", ""))
     await send(
@@ -281,6 +309,29 @@ async def large(scope, receive, send):
     )
 
 
+RANGE_BODY = bytes(range(256)) * 4096  # 1MiB
+
+
+async def range_body(scope, receive, send):
+    """Serves RANGE_BODY, honoring `Range: bytes=N-`."""
+    headers = dict(scope.get("headers", []))
+    start = 0
+    status = 200
+    range_header = headers.get(b"range", b"")
+    if range_header.startswith(b"bytes="):
+        start = int(range_header[6:].split(b"-")[0])
+        status = 206
+    body = RANGE_BODY[start:]
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [[b"content-length", str(len(body)).encode()]],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
 async def empty_body(scope, receive, send):
     await send({"type": "http.response.start", "status": 200})
     await send({"type": "http.response.body", "body": b""})
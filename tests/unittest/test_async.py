@@ -1,4 +1,12 @@
+import asyncio
+import socket
+import sys
+
+import pytest
+
 from curl_cffi import AsyncCurl, Curl, CurlOpt
+from curl_cffi.aio import EpollSelector
+from curl_cffi.requests import AsyncSession
 
 
 async def test_init(server):
@@ -29,3 +37,75 @@ async def test_socket_action(server):
 
 async def test_process_data(server):
     ...
+
+
+async def test_many_handles(server):
+    ac = AsyncCurl()
+    curls = []
+    for _ in range(20):
+        c = Curl()
+        c.setopt(CurlOpt.URL, str(server.url).encode())
+        c.setopt(CurlOpt.WRITEFUNCTION, lambda x: len(x))
+        curls.append(c)
+    await asyncio.gather(*[ac.add_handle(c) for c in curls])
+    # the registered masks are only CURL_POLL_IN, CURL_POLL_OUT or both
+    assert all(mask in (1, 2, 3) for mask in ac._sockfds.values())
+    ac.close()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="epoll is Linux only")
+async def test_epoll(server):
+    ac = AsyncCurl(epoll=True)
+    curls = []
+    for _ in range(5):
+        c = Curl()
+        c.setopt(CurlOpt.URL, str(server.url).encode())
+        c.setopt(CurlOpt.WRITEFUNCTION, lambda x: len(x))
+        curls.append(c)
+    await asyncio.gather(*[ac.add_handle(c) for c in curls])
+    ac.close()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="epoll is Linux only")
+async def test_epoll_closed_fds():
+    selector = EpollSelector(asyncio.get_running_loop())
+    a, b = socket.socketpair()
+    fd = a.fileno()
+    selector.add_reader(fd, lambda: None)
+    a.close()
+    # the fd is closed, nothing is left registered for it
+    selector.add_writer(fd, lambda: None)
+    assert fd not in selector._registered
+    selector.remove_writer(fd)
+    selector.remove_reader(fd)
+
+    # the fd is reused by another socket before curl removes the old one
+    c, d = socket.socketpair()
+    fd = c.fileno()
+    selector.add_reader(fd, lambda: None)
+    c.close()
+    e, f = socket.socketpair()
+    if e.fileno() != fd:
+        pytest.skip("the fd was not reused")
+    written = asyncio.Event()
+    selector.add_writer(fd, written.set)
+    await asyncio.wait_for(written.wait(), 1)
+    selector.close()
+    for s in (b, d, e, f):
+        s.close()
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="epoll is Linux only")
+def test_epoll_uvloop(server):
+    uvloop = pytest.importorskip("uvloop")
+
+    async def main():
+        async with AsyncSession(epoll=True) as s:
+            rs = await asyncio.gather(*[s.get(str(server.url)) for _ in range(5)])
+            assert all(r.status_code == 200 for r in rs)
+
+    loop = uvloop.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
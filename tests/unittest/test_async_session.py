@@ -4,6 +4,7 @@ import json
 
 import pytest
 
+from curl_cffi import CurlInfo
 from curl_cffi.requests import AsyncSession, RequestsError
 
 
@@ -41,6 +42,30 @@ async def test_post_str(server):
         assert r.content == b'{"foo": "bar"}'
 
 
+async def test_post_async_generator(server):
+    async def gen():
+        for i in range(10):
+            await asyncio.sleep(0.01)
+            yield b"%d" % i
+
+    async with AsyncSession() as s:
+        r = await s.post(str(server.url.copy_with(path="/echo_body")), data=gen())
+        assert r.status_code == 200
+        assert r.content == b"0123456789"
+
+
+async def test_post_async_generator_raises(server):
+    async def gen():
+        yield b"foo"
+        await asyncio.sleep(0.01)
+        raise ValueError("no more data")
+
+    async with AsyncSession() as s:
+        with pytest.raises(RequestsError) as e:
+            await s.post(str(server.url.copy_with(path="/echo_body")), data=gen())
+        assert isinstance(e.value.__cause__, ValueError)
+
+
 async def test_post_json(server):
     async with AsyncSession() as s:
         r = await s.post(
@@ -293,7 +318,8 @@ async def test_timers_leak(server):
                 await sess.get(str(server.url.copy_with(path="/slow_response")), timeout=0.1)
             except:
                 pass
-            assert len(sess.acurl._timers) == 0
+            # no transfers, no timer
+            assert sess.acurl._timer is None
 
 
 #######################################################################################
@@ -369,3 +395,93 @@ async def test_stream_atext(server):
             assert len(chunks) == 20
 
 
+
+
+async def test_template(server):
+    async with AsyncSession(max_clients=2) as s:
+        with s.template(headers={"Foo": "bar"}) as tpl:
+            url = str(server.url.copy_with(path="/echo_headers"))
+            rs = await asyncio.gather(*[tpl.get(url) for _ in range(5)])
+            for r in rs:
+                assert r.json()["Foo"][0] == "bar"
+
+
+async def test_map(server):
+    async with AsyncSession() as s:
+        url = str(server.url.copy_with(path="/echo_params"))
+        reqs = ({"url": url, "params": {"i": i}} for i in range(20))
+        seen = set()
+        async for r in s.map(reqs, concurrency=3):
+            assert r.status_code == 200
+            seen.add(r.json()["params"]["i"][0])
+        assert seen == {str(i) for i in range(20)}
+
+
+async def test_map_return_exceptions(server):
+    async with AsyncSession() as s:
+        reqs = [
+            str(server.url),
+            {"method": "GET", "url": str(server.url), "max_redirects": 0},
+            "http://127.0.0.1:1/unreachable",
+        ]
+        results = [r async for r in s.map(reqs, return_exceptions=True)]
+        assert len(results) == 3
+        assert sum(isinstance(r, RequestsError) for r in results) == 1
+
+
+async def test_max_host_connections(server):
+    async with AsyncSession(
+        max_host_connections=1, pipewait=True, curl_infos=[CurlInfo.NUM_CONNECTS]
+    ) as s:
+        rs = await asyncio.gather(*[s.get(str(server.url)) for _ in range(5)])
+        assert sum(r.infos[CurlInfo.NUM_CONNECTS] for r in rs) == 1
+
+
+async def test_stream_max_buffered_bytes(server):
+    limit = 1024 * 1024
+    async with AsyncSession(max_buffered_bytes=limit) as s:
+        url = str(server.url.copy_with(path="/large"))
+        async with s.stream("GET", url) as r:
+            total = 0
+            async for chunk in r.aiter_content():
+                # what's waiting never grows much beyond the limit
+                assert r.queue._buffered <= limit
+                total += len(chunk)
+                await asyncio.sleep(0)
+            assert total == 20 * 1024 * 1024
+
+
+async def test_stream_chunk_size(server):
+    async with AsyncSession() as s:
+        url = str(server.url.copy_with(path="/stream"))
+        async with s.stream("GET", url, params={"n": "20"}) as r:
+            chunks = [chunk async for chunk in r.aiter_content(chunk_size=7)]
+            assert all(len(chunk) == 7 for chunk in chunks[:-1])
+            assert 0 < len(chunks[-1]) <= 7
+
+
+async def test_stream_aiter_events(server):
+    async with AsyncSession() as s:
+        url = str(server.url.copy_with(path="/events"))
+        async with s.stream("GET", url) as r:
+            events = [e async for e in r.aiter_events()]
+        assert [e.id for e in events] == ["1", "2"]
+        assert events[1].data == "line 1\n2"
+
+
+async def test_events_reconnect(server):
+    async with AsyncSession() as s:
+        url = str(server.url.copy_with(path="/events"))
+        events = [e async for e in s.events(url)]
+        assert [e.id for e in events] == ["1", "2", "3", "4"]
+
+
+async def test_download(server, tmp_path):
+    range_body = bytes(range(256)) * 4096  # served by /range
+    path = tmp_path / "download.bin"
+    path.write_bytes(range_body[:1000])
+    async with AsyncSession() as s:
+        url = str(server.url.copy_with(path="/range"))
+        r = await s.download(url, path, resume=True, preallocate=True)
+        assert r.status_code == 206
+        assert path.read_bytes() == range_body
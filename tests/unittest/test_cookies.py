@@ -1,6 +1,7 @@
+import time
 import pytest
 from curl_cffi.requests.models import Request
-from curl_cffi.requests.cookies import Cookies, CurlMorsel
+from curl_cffi.requests.cookies import Cookies, CurlMorsel, IndexedCookieJar
 from curl_cffi.requests.headers import Headers
 from curl_cffi.requests.errors import CookieConflict, RequestsError
 
@@ -41,3 +42,89 @@ def test_curl_format_without_hostname():
     m = CurlMorsel(name="foo", value="bar")
     with pytest.raises(RequestsError):
         m.to_curl_format()
+
+
+def test_indexed_jar_cookies_for_host():
+    c = Cookies(IndexedCookieJar())
+    c.set("a", "1", domain=".example.com")
+    c.set("b", "2", domain="www.example.com")
+    c.set("c", "3", domain="example.com")
+    c.set("d", "4", domain="other.org")
+    c.set("e", "5")
+
+    def names(url):
+        morsels = c.get_cookies_for_curl(Request(url, Headers(), "GET"))
+        return sorted(m.name for m in morsels)
+
+    assert names("https://www.example.com/") == ["a", "b", "e"]
+    assert names("https://example.com/") == ["a", "c", "e"]
+    assert names("https://a.b.example.com/") == ["a", "e"]
+    assert names("https://x.org/") == ["e"]
+
+
+def test_indexed_jar_mapping():
+    c = Cookies(IndexedCookieJar())
+    c.set("foo", "bar", domain="example.com")
+    c.set("foo", "baz", domain="test.local")
+    c.set("hello", "world", domain="example.com")
+    assert len(c) == 3
+    assert c.get("hello") == "world"
+    with pytest.raises(CookieConflict):
+        c.get("foo")
+    c.delete("foo", domain="test.local")
+    assert c["foo"] == "bar"
+    del c["foo"]
+    assert "foo" not in c
+    assert list(c) == ["hello"]
+    c.clear("example.com")
+    assert len(c) == 0
+    assert c.jar.cookies_for_host("example.com") == []
+
+
+def test_indexed_jar_clear_expired():
+    c = Cookies(IndexedCookieJar())
+    now = int(time.time())
+    for i, expires in enumerate([now - 10, now + 3600, now - 1]):
+        m = CurlMorsel(name=f"c{i}", value="v", hostname="example.com", expires=expires)
+        c.jar.set_cookie(m.to_cookiejar_cookie())
+    c.jar.clear_expired_cookies()
+    assert list(c) == ["c1"]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_cookies_save_load(tmp_path, binary):
+    c = Cookies()
+    c.set("foo", "bar", domain=".example.com")
+    c.set("hello", "world", domain="test.local", path="/path")
+    c.set("no_domain", "x")
+    expires = int(time.time()) + 3600
+    m = CurlMorsel(
+        name="h", value="v", hostname="example.com", expires=expires, http_only=True
+    )
+    c.jar.set_cookie(m.to_cookiejar_cookie())
+    m = CurlMorsel(name="expired", value="v", hostname="example.com", expires=1)
+    c.jar.set_cookie(m.to_cookiejar_cookie())
+    path = str(tmp_path / "cookies")
+    c.save(path, binary=binary)
+
+    loaded = Cookies()
+    loaded.load(path)
+    assert sorted(loaded) == ["foo", "h", "hello"]
+    assert loaded.get("hello", path="/path") == "world"
+    cookie = next(cookie for cookie in loaded.jar if cookie.name == "h")
+    assert cookie.expires == expires
+    assert cookie.get_nonstandard_attr("http_only")
+
+
+def test_cookies_load_curl_file(tmp_path):
+    path = tmp_path / "cookies.txt"
+    path.write_text(
+        "# Netscape HTTP Cookie File\n"
+        "# https://curl.se/docs/http-cookies.html\n"
+        "\n"
+        ".example.com\tTRUE\t/\tFALSE\t0\tfoo\tbar\n"
+        "#HttpOnly_example.com\tFALSE\t/\tTRUE\t0\tsid\t42\n"
+    )
+    c = Cookies()
+    c.load(str(path))
+    assert dict(c) == {"foo": "bar", "sid": "42"}
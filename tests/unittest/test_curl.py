@@ -4,7 +4,8 @@ from io import BytesIO
 
 import pytest
 
-from curl_cffi import Curl, CurlError, CurlInfo, CurlOpt
+from curl_cffi import Curl, CurlError, CurlHttpVersion, CurlInfo, CurlOpt, CurlShare
+from curl_cffi.curl import ContentBuffer
 
 #######################################################################################
 # testing setopt
@@ -29,6 +30,95 @@ def test_post(server):
     assert buffer.getvalue() == b"foo=bar"
 
 
+def test_content_buffer(server):
+    c = Curl()
+    url = str(server.url.copy_with(path="/echo_body"))
+    c.setopt(CurlOpt.URL, url.encode())
+    c.setopt(CurlOpt.POSTFIELDS, b"foo=bar")
+    buffer = ContentBuffer(c)
+    c.setopt(CurlOpt.WRITEDATA, buffer)
+    c.perform()
+    assert buffer.getvalue() == b"foo=bar"
+    assert buffer.getbuffer() == b"foo=bar"
+
+
+def test_content_buffer_preallocated(server):
+    c = Curl()
+    url = str(server.url.copy_with(path="/range"))
+    c.setopt(CurlOpt.URL, url.encode())
+    buffer = ContentBuffer(c)
+    c.setopt(CurlOpt.WRITEDATA, buffer)
+    c.perform()
+    body = bytes(range(256)) * 4096
+    assert c.getinfo(CurlInfo.CONTENT_LENGTH_DOWNLOAD_T) == len(body)
+    assert buffer.getvalue() == body
+    assert buffer.getbuffer() == body
+
+
+def test_content_buffer_preallocation_capped():
+    class HugeLengthCurl:
+        def getinfo(self, option):
+            return 8_000_000_000
+
+    buffer = ContentBuffer(HugeLengthCurl())  # type: ignore
+    buffer.write(b"foo")
+    assert len(buffer._buffer) == 16 * 1024 * 1024  # type: ignore
+    assert buffer.getvalue() == b"foo"
+
+
+def test_setopts(server):
+    c = Curl()
+    url = str(server.url.copy_with(path="/echo_body"))
+    buffer = BytesIO()
+    c.setopts(
+        {
+            CurlOpt.URL: url.encode(),
+            CurlOpt.POST: 1,
+            CurlOpt.FOLLOWLOCATION: 1,
+            CurlOpt.POSTFIELDS: b"\0" * 7,
+            CurlOpt.POSTFIELDSIZE_LARGE: 7,
+            CurlOpt.WRITEDATA: buffer,
+        }
+    )
+    c.perform()
+    assert buffer.getvalue() == b"\0" * 7
+
+
+def test_incremental_reset(server):
+    c = Curl()
+    c.impersonate("chrome110")
+    url = str(server.url.copy_with(path="/echo_body"))
+    c.setopt(CurlOpt.URL, url.encode())
+    c.setopt(CurlOpt.CUSTOMREQUEST, b"PATCH")
+    c.setopt(CurlOpt.POSTFIELDS, b"foo")
+    c.setopt(CurlOpt.HTTP_VERSION, CurlHttpVersion.V1_1)
+    c.setopt(CurlOpt.WRITEDATA, BytesIO())
+    c.perform()
+    c.reset(incremental=True)
+    assert c._is_cert_set is True
+    assert c._impersonation == ("chrome110", True)
+
+    buffer = BytesIO()
+    c.setopt(CurlOpt.URL, url.encode())
+    c.setopt(CurlOpt.WRITEDATA, buffer)
+    c.perform()
+    # method and body are reverted
+    assert buffer.getvalue() == b""
+
+
+def test_cacert_loaded_once():
+    from curl_cffi.curl import DEFAULT_CACERT, _get_cacert_blob
+
+    blob = _get_cacert_blob(DEFAULT_CACERT)
+    assert blob is not None
+    assert _get_cacert_blob(DEFAULT_CACERT) == blob
+    assert _get_cacert_blob("/not/a/ca/bundle.pem") is None
+
+    c = Curl()
+    c._ensure_cacert()
+    assert c._is_cert_set is True
+
+
 def test_put(server):
     c = Curl()
     c.setopt(CurlOpt.URL, str(server.url).encode())
@@ -320,3 +410,18 @@ def test_duphandle(server):
     c = c.duphandle()
     with pytest.raises(CurlError):
         c.perform()
+
+
+def test_share(server):
+    share = CurlShare(connections=True)
+    url = str(server.url).encode()
+    c1 = Curl()
+    c1.setopt(CurlOpt.SHARE, share)
+    c1.setopt(CurlOpt.URL, url)
+    c1.perform()
+    c2 = Curl()
+    c2.setopt(CurlOpt.SHARE, share)
+    c2.setopt(CurlOpt.URL, url)
+    c2.perform()
+    # the connection opened by the first handle is reused by the second one.
+    assert c2.getinfo(CurlInfo.NUM_CONNECTS) == 0
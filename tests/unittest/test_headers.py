@@ -21,3 +21,21 @@ def test_header_output():
     headers = Headers({"X-Foo": "bar"})
     header_list = headers.multi_items()
     assert header_list[0][0] == "X-Foo"
+
+
+def test_headers_lookup_after_change():
+    headers = Headers([("Set-Cookie", "a"), ("set-cookie", "b")])
+    assert headers["SET-COOKIE"] == "a, b"
+    assert dict(headers.items()) == {"set-cookie": "a, b"}
+    headers["X-Foo"] = "bar"
+    assert "x-foo" in headers
+    assert list(headers.keys()) == ["set-cookie", "x-foo"]
+    del headers["set-cookie"]
+    assert "Set-Cookie" not in headers
+    headers.update({"x-foo": "baz"})
+    assert list(headers.values()) == ["baz"]
+
+
+def test_headers_to_curl_lines():
+    headers = Headers({"X-Foo": "bar", "Accept": b"\xe4"})
+    assert headers.to_curl_lines() == [b"X-Foo: bar", b"Accept: \xe4"]
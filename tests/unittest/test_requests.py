@@ -1,12 +1,17 @@
 import base64
+import threading
 import time
 from io import BytesIO
 import json
+import os
+import tempfile
 
 import pytest
 
-from curl_cffi import requests, CurlOpt
+from curl_cffi import requests, CurlError, CurlOpt
 from curl_cffi.const import CurlECode, CurlInfo
+from curl_cffi.requests.cookies import CurlMorsel
+from curl_cffi.requests.session import _push_cookies
 
 
 def test_head(server):
@@ -51,6 +56,112 @@ def test_post_str(server):
     assert r.content == b'{"foo": "bar"}'
 
 
+def test_post_file(server, tmp_path):
+    path = tmp_path / "body.bin"
+    path.write_bytes(b"0123456789" * 100000)
+    with open(path, "rb") as f:
+        r = requests.post(str(server.url.copy_with(path="/echo_body")), data=f)
+    assert r.status_code == 200
+    assert r.content == b"0123456789" * 100000
+
+
+def _pipe_with(content: bytes):
+    """The read end of a pipe, with content written and the write end closed."""
+    r, w = os.pipe()
+    os.write(w, content)
+    os.close(w)
+    return open(r, "rb")
+
+
+def test_post_pipe(server):
+    with _pipe_with(b"from a pipe" * 1000) as f:
+        r = requests.post(str(server.url.copy_with(path="/echo_body")), data=f)
+    assert r.status_code == 200
+    assert r.content == b"from a pipe" * 1000
+
+
+def test_post_form_pairs(server):
+    url = str(server.url.copy_with(path="/echo_body"))
+    r = requests.post(url, data=[("a", "1"), ("a", "2"), ("b", "3")])
+    assert r.content == b"a=1&a=2&b=3"
+
+
+def test_post_generator(server):
+    def gen():
+        yield b"foo"
+        yield "bar"
+        yield b""
+        yield b"baz"
+
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/echo_body"))
+        r = s.post(url, data=gen())
+        assert r.status_code == 200
+        assert r.content == b"foobarbaz"
+        # the read callback is removed afterwards
+        r = s.post(url, data=b"plain")
+        assert r.content == b"plain"
+
+
+def test_post_generator_raises(server):
+    def gen():
+        yield b"foo"
+        raise ValueError("no more data")
+
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/echo_body"))
+        with pytest.raises(requests.RequestsError) as e:
+            s.post(url, data=gen())
+        assert isinstance(e.value.__cause__, ValueError)
+        assert str(e.value.__cause__) == "no more data"
+        r = s.post(url, data=b"plain")
+        assert r.content == b"plain"
+
+
+def test_post_files(server, tmp_path):
+    path = tmp_path / "upload.txt"
+    path.write_bytes(b"file on disk")
+    with open(path, "rb") as f:
+        r = requests.post(
+            str(server.url.copy_with(path="/echo_body")),
+            data={"foo": "bar"},
+            files={
+                "disk": f,
+                "path": path,
+                "memory": ("memory.bin", BytesIO(b"file in memory"), "image/png"),
+                "content": b"raw content",
+            },
+        )
+    assert r.status_code == 200
+    body = r.content
+    assert b'name="foo"\r\n\r\nbar\r\n' in body
+    assert b'name="disk"; filename="upload.txt"' in body
+    assert body.count(b"file on disk") == 2
+    assert b'name="memory"; filename="memory.bin"\r\nContent-Type: image/png' in body
+    assert b"file in memory" in body
+    assert b"raw content" in body
+
+
+def test_post_files_pipe(server):
+    with _pipe_with(b"from a pipe") as f:
+        r = requests.post(
+            str(server.url.copy_with(path="/echo_body")),
+            files={"pipe": ("pipe.txt", f)},
+        )
+    assert r.status_code == 200
+    assert b'name="pipe"; filename="pipe.txt"\r\n' in r.content
+    assert b"from a pipe" in r.content
+
+
+def test_post_files_with_raw_data(server):
+    url = str(server.url.copy_with(path="/echo_body"))
+    for data in ["foo=bar", b"foo=bar", BytesIO(b"foo=bar")]:
+        with pytest.raises(ValueError):
+            requests.post(url, data=data, files={"content": b"raw content"})
+    r = requests.post(url, data=[("foo", "bar")], files={"content": b"raw content"})
+    assert b'name="foo"\r\n\r\nbar\r\n' in r.content
+
+
 def test_post_no_body(server):
     r = requests.post(str(server.url), headers={"Content-Type": "application/json"})
     assert r.status_code == 200
@@ -413,7 +524,8 @@ def test_post_body_cleaned(server):
     # POST with body
     r = s.post(str(server.url), json={"foo": "bar"})
     # GET request with echo_body
-    assert s.curl._is_cert_set is False
+    # the CA store is kept between requests
+    assert s.curl._is_cert_set is True
     r = s.get(str(server.url.copy_with(path="/echo_body")))
     # ensure body is empty
     assert r.content == b""
@@ -469,6 +581,29 @@ def test_stream_empty_body(server):
             assert r.status_code == 200
 
 
+def test_stream_many_on_one_thread(server):
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/stream"))
+        threads = threading.active_count()
+        rs = [s.request("GET", url, params={"n": "20"}, stream=True) for _ in range(20)]
+        # consume the streams in turns, each one is driven only when read from.
+        iters = [r.iter_lines() for r in rs]
+        counts = [0] * len(rs)
+        active = set(range(len(rs)))
+        while active:
+            for idx in list(active):
+                if next(iters[idx], None) is None:
+                    active.discard(idx)
+                else:
+                    counts[idx] += 1
+        for r in rs:
+            r.close()
+        assert counts == [20] * 20
+        # no worker thread is started for the streams
+        assert threading.active_count() == threads
+        assert s._executor is None
+
+
 # def test_stream_large_body(server):
 #     with requests.Session() as s:
 #         url = str(server.url.copy_with(path="/stream"))
@@ -608,3 +743,259 @@ def test_curl_infos(server):
     r = s.get(str(server.url))
 
     assert r.infos[CurlInfo.PRIMARY_IP] == b"127.0.0.1"
+
+
+def test_session_share_connections_across_threads(server):
+    s = requests.Session(curl_infos=[CurlInfo.NUM_CONNECTS], share_connections=True)
+    s.get(str(server.url))
+
+    results = []
+    t = threading.Thread(target=lambda: results.append(s.get(str(server.url))))
+    t.start()
+    t.join()
+
+    # the new thread has its own curl handle, but reuses the shared connection.
+    assert results[0].infos[CurlInfo.NUM_CONNECTS] == 0
+
+
+def test_session_template(server):
+    with requests.Session() as s:
+        tpl = s.template(headers={"Foo": "bar"}, timeout=10)
+        for _ in range(3):
+            r = tpl.get(str(server.url.copy_with(path="/echo_headers")))
+            assert r.json()["Foo"][0] == "bar"
+        r = tpl.post(
+            str(server.url.copy_with(path="/echo_body")),
+            json={"foo": "bar"},
+            headers={"X-Extra": "1"},
+        )
+        assert r.json() == {"foo": "bar"}
+        tpl.close()
+
+
+def test_session_template_stream_outlives_template(server):
+    with requests.Session() as s:
+        tpl = s.template(headers={"Foo": "bar"}, timeout=10)
+        r = tpl.get(str(server.url.copy_with(path="/echo_headers")), stream=True)
+        # the streamed handle has a header list of its own
+        tpl.close()
+        assert json.loads(b"".join(r.iter_content()))["Foo"][0] == "bar"
+        # and is closed once the stream is done
+        assert r.curl._curl is None
+
+
+def test_fetch_many(server):
+    url = str(server.url.copy_with(path="/echo_params"))
+    with requests.Session() as s:
+        reqs = ({"url": url, "params": {"i": i}} for i in range(20))
+        seen = set()
+        for r in s.fetch_many(reqs, concurrency=5):
+            assert r.status_code == 200
+            seen.add(r.json()["params"]["i"][0])
+        assert seen == {str(i) for i in range(20)}
+
+
+def test_fetch_many_return_exceptions(server):
+    with requests.Session() as s:
+        reqs = [str(server.url), "http://127.0.0.1:1/unreachable"]
+        results = list(s.fetch_many(reqs, return_exceptions=True))
+        assert len(results) == 2
+        assert sum(isinstance(r, requests.RequestsError) for r in results) == 1
+
+
+def test_stream_max_buffered_bytes(server):
+    limit = 1024 * 1024
+    with requests.Session(max_buffered_bytes=limit) as s:
+        url = str(server.url.copy_with(path="/large"))
+        with s.stream("GET", url) as r:
+            total = 0
+            for chunk in r.iter_content():
+                assert r.queue._buffered <= limit
+                total += len(chunk)
+            assert total == 20 * 1024 * 1024
+
+
+def test_stream_chunk_size(server):
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/large"))
+        with s.stream("GET", url) as r:
+            sizes = [len(chunk) for chunk in r.iter_content(chunk_size=1000 * 1000)]
+            assert sizes[:-1] == [1000 * 1000] * 20
+            assert sizes[-1] == 20 * 1024 * 1024 - 20 * 1000 * 1000
+
+
+def test_stream_iter_lines_small_chunks(server):
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/stream"))
+        with s.stream("GET", url, params={"n": "20"}) as r:
+            lines = list(r.iter_lines(chunk_size=3))
+            assert len(lines) == 20
+            for line in lines:
+                assert json.loads(line)["path"] == "/stream"
+
+
+def test_stream_iter_events(server):
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/events"))
+        with s.stream("GET", url) as r:
+            events = list(r.iter_events())
+        assert [e.id for e in events] == ["1", "2"]
+        assert events[0].event == "tick"
+        assert events[0].data == "line 1\n1"
+        assert events[0].retry == 10
+
+
+def test_events_reconnect(server):
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/events"))
+        # the server resumes from Last-Event-ID, and ends with a 204 after id 4
+        events = list(s.events(url))
+        assert [e.id for e in events] == ["1", "2", "3", "4"]
+        assert events[-1].data == "line 1\n4"
+
+
+def test_events_http_error(server):
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/status/500"))
+        with pytest.raises(requests.RequestsError):
+            list(s.events(url))
+
+
+def test_events_not_retried(server):
+    with requests.Session() as s:
+        # a tls error, the server speaks plain http
+        url = str(server.url.copy_with(scheme="https", path="/events"))
+        with pytest.raises(requests.RequestsError) as e:
+            list(s.events(url))
+        assert e.value.code == CurlECode.SSL_CONNECT_ERROR
+        with pytest.raises(requests.RequestsError) as e:
+            list(s.events("foo://127.0.0.1/events"))
+        assert e.value.code == CurlECode.UNSUPPORTED_PROTOCOL
+
+
+def test_download(server, tmp_path):
+    range_body = bytes(range(256)) * 4096  # served by /range
+    path = tmp_path / "download.bin"
+    with requests.Session() as s:
+        url = str(server.url.copy_with(path="/range"))
+        r = s.download(url, path, preallocate=True)
+        assert r.status_code == 200
+        assert r.content == b""
+        assert path.read_bytes() == range_body
+
+
+def test_download_resume(server, tmp_path):
+    range_body = bytes(range(256)) * 4096  # served by /range
+    path = tmp_path / "download.bin"
+    path.write_bytes(range_body[:1000])
+    with requests.Session() as s:
+        r = s.download(str(server.url.copy_with(path="/range")), path, resume=True)
+        assert r.status_code == 206
+        assert path.read_bytes() == range_body
+        # the server ignores the range, the file is written again from the start
+        path.write_bytes(b"x" * 1000)
+        s.download(str(server.url.copy_with(path="/echo_path")), path, resume=True)
+        assert json.loads(path.read_bytes()) == {"path": "/echo_path"}
+
+
+def test_download_fd_at_position(server, tmp_path):
+    range_body = bytes(range(256)) * 4096  # served by /range
+    path = tmp_path / "download.bin"
+    with open(path, "wb") as f:
+        f.write(b"header")
+        f.flush()
+        with requests.Session() as s:
+            r = s.download(str(server.url.copy_with(path="/range")), f.fileno())
+        # no range request, written after what's before the position
+        assert r.status_code == 200
+    assert path.read_bytes() == b"header" + range_body
+
+
+def test_download_unsupported_arguments(tmp_path):
+    with requests.Session() as s:
+        for kwargs in ({"stream": True}, {"accept_encoding": "gzip"}):
+            with pytest.raises(TypeError):
+                s.download("http://example.com", tmp_path / "file", **kwargs)
+
+
+def test_download_error_not_written(server, tmp_path):
+    path = tmp_path / "download.bin"
+    with requests.Session() as s:
+        r = s.download(str(server.url.copy_with(path="/status/404")), path)
+        assert r.status_code == 404
+        assert path.read_bytes() == b""
+
+
+def test_response_parsed_after_reuse(server):
+    with requests.Session() as s:
+        r1 = s.get(str(server.url.copy_with(path="/set_cookies")))
+        r2 = s.get(str(server.url.copy_with(path="/status/404")))
+        # parsed lazily, from what was received, not from the reused handle
+        assert r2.reason == "Not Found"
+        assert r1.reason == "OK"
+        assert r1.headers["content-type"] == r2.headers["content-type"] == "text/plain"
+        assert r1.encoding == r1.charset == "utf-8"
+        # cookies set by the first response are kept by the second
+        assert s.cookies["foo"] == "bar"
+
+
+def test_cookies_synced_incrementally(server):
+    s = requests.Session()
+    url = str(server.url.copy_with(path="/echo_cookies"))
+    s.cookies.set("foo", "bar", domain="127.0.0.1")
+    s.cookies.set("other", "x", domain="example.com")
+    assert s.get(url).json() == {"foo": "bar"}
+
+    loads = []
+    load_all = s.cookies.get_cookies_for_curl
+    s.cookies.get_cookies_for_curl = lambda req: loads.append(req) or load_all(req)
+    s.cookies.set("foo", "baz", domain="127.0.0.1")
+    s.cookies.set("hello", "world", domain="127.0.0.1")
+    assert s.get(url).json() == {"foo": "baz", "hello": "world"}
+    s.cookies.delete("foo")
+    assert s.get(url).json() == {"hello": "world"}
+    # only the changes were pushed to curl
+    assert loads == []
+
+
+def test_indexed_cookie_jar(server):
+    s = requests.Session(cookies=requests.IndexedCookieJar())
+    s.cookies.set("foo", "bar", domain="127.0.0.1")
+    s.cookies.set("other", "x", domain="example.com")
+    s.get(str(server.url.copy_with(path="/set_cookies")))
+    assert s.cookies["foo"] == "bar"
+
+    loads = []
+    load_host = s.cookies.get_cookies_for_curl
+    s.cookies.get_cookies_for_curl = lambda req: loads.append(req) or load_host(req)
+    url = str(server.url.copy_with(path="/echo_cookies"))
+    s.cookies.set("hello", "world", domain="127.0.0.1")
+    assert s.get(url).json() == {"foo": "bar", "hello": "world"}
+    # the host was loaded by the first request already
+    assert loads == []
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_cookies_bulk_loaded(server, bulk):
+    s = requests.Session(bulk_cookies=bulk)
+    url = str(server.url.copy_with(path="/echo_cookies"))
+    cookies = {f"name{i}": f"value{i}" for i in range(300)}
+    for name, value in cookies.items():
+        s.cookies.set(name, value, domain="127.0.0.1")
+    assert s.get(url).json() == cookies
+
+
+def test_cookies_bulk_file_removed_on_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    class FailingCurl:
+        def setopt(self, option, value):
+            raise CurlError("failed")
+
+    morsels = [
+        CurlMorsel(name=f"name{i}", value="value", hostname="example.com")
+        for i in range(300)
+    ]
+    with pytest.raises(CurlError):
+        _push_cookies(FailingCurl(), morsels, bulk=True)  # type: ignore
+    assert list(tmp_path.iterdir()) == []